@@ -2,16 +2,34 @@ from .route_v2 import set_base_dict_type
 from .route_v2 import set_sep
 from .route_v2 import enable_auto_convert
 from .route_v2 import disable_auto_convert
+from .route_v2 import enable_lazy_convert
+from .route_v2 import disable_lazy_convert
 from .route_v2 import Route
 from .route_v2 import OrderedRoute
+from .route_v2 import FlatRoute
+from .route_v2 import FrozenRoute
+from .route_v2 import ConcurrentRoute
+from .route_v2 import RouteArchive
+from .route_v2 import open_archive
 from .route_v2 import _Route
+from .route_v2 import _FlatRoute
+from .route_v2 import _ConcurrentRoute
 
 __all__ = [
     'set_base_dict_type',
     'set_sep',
     'enable_auto_convert',
     'disable_auto_convert',
+    'enable_lazy_convert',
+    'disable_lazy_convert',
     'Route',
     'OrderedRoute',
-    '_Route'
+    'FlatRoute',
+    'FrozenRoute',
+    'ConcurrentRoute',
+    'RouteArchive',
+    'open_archive',
+    '_Route',
+    '_FlatRoute',
+    '_ConcurrentRoute'
 ]
@@ -1,15 +1,50 @@
 
 # --- built in ---
 import os
+import abc
 import sys
+import json
 import time
+import zlib
+import struct
+import hashlib
+import fnmatch
 import inspect
 import logging
+import threading
+from collections import OrderedDict
+from collections import deque
 
 # --- 3rd party ---
 
 # --- my module ---
 
+# size of the chunks written into the archive
+_CHUNK_SIZE = 16 * 1024 * 1024
+# timestamp of the archived entries, fixed for reproducible archives
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# alignment of the data of the members to be mapped into memory
+_ZIP_ALIGN = 64
+# header id of the extra field used to pad the local file header
+_ZIP_ALIGN_EXTRA_ID = 0xD935
+# the members of the later generations of incremental archives and the
+# manifests of all generations are placed under this directory
+_ZIP_ROUTE_DIR = '.route/'
+_ZIP_MANIFEST_DIR = _ZIP_ROUTE_DIR + 'manifest/'
+# size of the sample and the compression ratio above which the members
+# are stored uncompressed, for the 'auto' compression policy
+_PROBE_SIZE = 64 * 1024
+_PROBE_RATIO = 0.9
+# index of the leaves of directory archives, in order
+_DIR_INDEX = os.path.join('.route', 'index.json')
+# key and extension of the columnar blocks, the minimum number of sibling
+# scalar leaves batched into a block and the maximum length of the strings.
+# The extension is reserved, so no leaf is archived as a block.
+_COLUMNS_KEY = '.columns'
+_COLUMNS_EXT = '.cols'
+_COLUMNS_MIN = 2
+_COLUMNS_MAX_STR = 256
+
 def _retrieve_outer_frame(outer=2, not_start_with=None):
     frame = inspect.currentframe()
     if not_start_with is None:
@@ -43,9 +78,427 @@ if frame is not None:
     print('WARNING:route:From {}:{}: route_v1 is deprecated (from route.route_v1), please use route_v2 insead.'.format(
                                                                         frame['filename'], frame['lineno']))
 
+class _ProbeDone(Exception):
+    pass
+
+
+class _ProbeWriter(object):
+    '''
+    File-like object collecting the first _PROBE_SIZE bytes written by
+    the streamers
+    '''
+
+    def __init__(self):
+        self.sample = b''
+
+    def write(self, data):
+        self.sample += bytes(data[:_PROBE_SIZE-len(self.sample)])
+
+        # enough, stop streaming
+        if len(self.sample) >= _PROBE_SIZE:
+            raise _ProbeDone
+
+        return len(data)
+
+def _probe_stream(streamer, value):
+    '''
+    Retrieve the first _PROBE_SIZE bytes of the streamed value
+    '''
+
+    writer = _ProbeWriter()
+
+    try:
+        streamer(value, writer)
+    except _ProbeDone:
+        pass
+
+    return writer.sample
+
+def _resolve_compression(policy, compress_type, compresslevel, sample=None):
+    '''
+    Resolve the compression policy into (compress_type, compresslevel)
+
+    :param policy: None for the default compress_type and compresslevel,
+                    a compression method (e.g. zipfile.ZIP_STORED), a tuple
+                    of (compression method, compresslevel), or 'auto' to
+                    store the member uncompressed if the sample does not
+                    compress well
+    :param sample: the first bytes of the serialized value (for 'auto')
+    '''
+
+    # === import ===
+    import zipfile
+
+    if policy is None:
+        return compress_type, compresslevel
+
+    if policy == 'auto':
+        sample = sample[:_PROBE_SIZE]
+
+        # probe the compression ratio with the fastest deflate
+        if sample and (len(zlib.compress(sample, 1)) > len(sample) * _PROBE_RATIO):
+            return zipfile.ZIP_STORED, None
+
+        return compress_type, compresslevel
+
+    if isinstance(policy, tuple):
+        return policy
+
+    return policy, None
+
+def _compressor(compress_type, compresslevel=None):
+    '''
+    Create the compressor of a member, the same as zipfile does. Return
+    None if the method is not supported, e.g. ZIP_LZMA, whose members are
+    left to zipfile to compress.
+    '''
+
+    # === import ===
+    import zipfile
+
+    if compress_type == zipfile.ZIP_DEFLATED:
+        if compresslevel is None:
+            compresslevel = zlib.Z_DEFAULT_COMPRESSION
+        return zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+
+    if compress_type == zipfile.ZIP_BZIP2:
+        import bz2
+        return bz2.BZ2Compressor(9 if compresslevel is None else compresslevel)
+
+    return None
+
+def _compress_entry(name, serializer, value, compress_type, compresslevel, policy=None, raw=True):
+    '''
+    Serialize and compress a leaf, return the ZipInfo, the data and whether
+    the data is compressed. If raw is False, or the compression method is
+    not supported by _compressor(), the data is only serialized.
+    '''
+
+    # === import ===
+    import zipfile
+
+    data = serializer(value)
+
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+
+    compress_type, compresslevel = _resolve_compression(policy, compress_type, compresslevel, data)
+
+    zinfo = _entry_info(name, compress_type, compresslevel)
+
+    if not raw:
+        return zinfo, data, False
+
+    if compress_type == zipfile.ZIP_STORED:
+        compressor = None
+    else:
+        compressor = _compressor(compress_type, compresslevel)
+
+        if compressor is None:
+            return zinfo, data, False
+
+    zinfo.file_size = len(data)
+    zinfo.CRC = zipfile.crc32(data)
+
+    if compressor is not None:
+        data = compressor.compress(data) + compressor.flush()
+
+    zinfo.compress_size = len(data)
+
+    return zinfo, data, True
+
+def _align_entry(zinfo, offset, zip64):
+    '''
+    Pad the extra field of zinfo, so that the data of the member written
+    at offset starts at a multiple of _ZIP_ALIGN
+    '''
+
+    # fixed local file header + file name + zip64 extra + padding extra header
+    size = 30 + len(zinfo.filename.encode('utf-8')) + (20 if zip64 else 0) + 4
+    padding = -(offset + size) % _ZIP_ALIGN
+
+    zinfo.extra = struct.pack('<HH', _ZIP_ALIGN_EXTRA_ID, padding) + b'\0' * padding
+
+def _entry_info(name, compress_type, compresslevel=None):
+    '''
+    Create the ZipInfo of a member with the given compression
+    '''
+
+    # === import ===
+    import zipfile
+
+    zinfo = zipfile.ZipInfo(name, date_time=_ZIP_DATE_TIME)
+    zinfo.compress_type = compress_type
+    zinfo.external_attr = 0o600 << 16  # permissions: ?rw-------
+
+    # read by ZipFile.open(zinfo, 'w'), public since python 3.13
+    if hasattr(zinfo, 'compress_level'):
+        zinfo.compress_level = compresslevel
+    else:
+        zinfo._compresslevel = compresslevel
+
+    return zinfo
+
+def _aligned_info(name, offset, zip64):
+    '''
+    Create the ZipInfo of an uncompressed and aligned member
+    '''
+
+    # === import ===
+    import zipfile
+
+    zinfo = _entry_info(name, zipfile.ZIP_STORED)
+
+    _align_entry(zinfo, offset, zip64)
+
+    return zinfo
+
+# the internals of zipfile.ZipFile used to append the precompressed entries
+_ZIP_INTERNALS = ('_lock', '_writecheck', '_didModify', '_seekable', '_allowZip64', 'start_dir')
+
+def _raw_writable(zf):
+    '''
+    Whether the precompressed entries can be appended to zf by
+    _write_entry(). This depends on the internals of zipfile.ZipFile,
+    which are checked here, otherwise the entries are compressed by
+    ZipFile.writestr() in the writer thread.
+    '''
+
+    # === import ===
+    import zipfile
+
+    return (type(zf) is zipfile.ZipFile) and all(hasattr(zf, attr) for attr in _ZIP_INTERNALS)
+
+def _write_entry(zf, zinfo, data, compressed=True, aligned=False):
+    '''
+    Append an entry to the zip file, the compressed entries are appended
+    as they are and require _raw_writable(zf)
+    '''
+
+    # === import ===
+    import zipfile
+
+    if not compressed:
+        if aligned:
+            _align_entry(zinfo, zf.fp.tell(), len(data) * 1.05 > zipfile.ZIP64_LIMIT)
+
+        zf.writestr(zinfo, data)
+        return
+
+    zip64 = (zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT) or (zinfo.compress_size > zipfile.ZIP64_LIMIT)
+
+    with zf._lock:
+        if zip64 and not zf._allowZip64:
+            raise zipfile.LargeZipFile('Filesize would require ZIP64 extensions')
+
+        if zf._seekable:
+            zf.fp.seek(zf.start_dir)
+        zinfo.header_offset = zf.fp.tell()
+
+        if aligned:
+            _align_entry(zinfo, zinfo.header_offset, zip64)
+
+        zf._writecheck(zinfo)
+        zf._didModify = True
+
+        # the sizes and CRC are already known, no need to rewrite the header
+        zf.fp.write(zinfo.FileHeader(zip64))
+        zf.fp.write(data)
+        zf.start_dir = zf.fp.tell()
+
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+
+
+class _HashWriter(object):
+    '''
+    File-like object hashing the data written by the streamers
+    '''
+
+    def __init__(self):
+        self.hash = hashlib.blake2b(digest_size=20)
+
+    def write(self, data):
+        self.hash.update(data)
+        return len(data)
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+class _Columns(list):
+    '''
+    A columnar block, the (key, value) of the scalar leaves of a node
+    which are archived together as one member
+    '''
+    pass
+
+
+def _is_scalar(v):
+    '''
+    Whether the leaf can be batched into a columnar block
+    '''
+
+    if type(v) in (int, float, bool, type(None)):
+        return True
+
+    return (type(v) is str) and (len(v) <= _COLUMNS_MAX_STR)
+
+
+def _is_columns(name):
+    '''
+    Whether the member is a columnar block
+    '''
+
+    return os.path.basename(name) == _COLUMNS_KEY + _COLUMNS_EXT
+
+
+class _LazySource(abc.ABC):
+    '''
+    The archive shared by the placeholders of a lazily restored Route,
+    with an optional size-bounded cache of the deserialized leaves. Without
+    the cache, the archive is closed once all placeholders are loaded.
+    '''
+
+    def __init__(self, route_cls, cache_size=None, mmap=False):
+        self.route_cls = route_cls
+        self.mmap = mmap
+        # maximum total size of the cached leaves (in bytes, measured by the
+        # size of their members), None to keep the leaves in the Route
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.cached_bytes = 0
+        # number of the placeholders not loaded yet
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        pass
+
+    def loaded(self):
+        '''
+        Called when a placeholder is replaced by its leaf
+        '''
+
+        with self.lock:
+            self.pending -= 1
+            done = (self.pending <= 0) and (self.cache_size is None)
+
+        if done:
+            self.close()
+
+    def load(self, name, ext):
+
+        with self.lock:
+            if name in self.cache:
+                self.cache.move_to_end(name)
+                return self.cache[name]
+
+        value = self._restore(name)
+
+        if self.cache_size is not None:
+            size = self._size(name)
+
+            with self.lock:
+                if (size <= self.cache_size) and (name not in self.cache):
+                    self.cache[name] = value
+                    self.cached_bytes += size
+
+                    # evict the least recently used leaves
+                    while self.cached_bytes > self.cache_size:
+                        evicted, _ = self.cache.popitem(last=False)
+                        self.cached_bytes -= self._size(evicted)
+
+        return value
+
+    @abc.abstractmethod
+    def _restore(self, name):
+        pass
+
+    @abc.abstractmethod
+    def _size(self, name):
+        pass
+
+
+class _ZipSource(_LazySource):
+
+    def __init__(self, zf, route_cls, cache_size=None, mmap=False, filename=None):
+        super(_ZipSource, self).__init__(route_cls, cache_size, mmap)
+        self.zf = zf
+        # the zip file opened by restore, None if it is given by the user
+        self.filename = filename
+
+    def close(self):
+        if self.filename is not None:
+            with self.lock:
+                self.zf.close()
+
+    def _restore(self, name):
+
+        # === import ===
+        import zipfile
+
+        # reopen for the placeholders shared by the copies of the Route
+        if self.filename is not None:
+            with self.lock:
+                if self.zf.fp is None:
+                    self.zf = zipfile.ZipFile(self.filename, 'r')
+
+        return self.route_cls._restore_member(self.zf, name, self.mmap)
+
+    def _size(self, name):
+        return self.zf.getinfo(name).file_size
+
+
+class _DirSource(_LazySource):
+
+    def __init__(self, root, route_cls, cache_size=None, mmap=False):
+        super(_DirSource, self).__init__(route_cls, cache_size, mmap)
+        self.root = root
+
+    def _restore(self, name):
+        return self.route_cls._restore_file(self.root, name, self.mmap)
+
+    def _size(self, name):
+        return os.path.getsize(self.route_cls._leaf_path(self.root, name))
+
+
+class _LazyLeaf(object):
+    '''
+    Placeholder of a leaf in the zip file, the leaf is read and
+    deserialized on first access
+    '''
+    __slots__ = ('source', 'name', 'ext')
+
+    def __init__(self, source, name, ext):
+        self.source = source
+        self.name = name
+        self.ext = ext
+
+    def load(self):
+        return self.source.load(self.name, self.ext)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return '<lazy leaf \'{}\'>'.format(self.name)
+
+
 class Route(dict):
     _sep = '.'
     _auto_convert_dict = True
+    # whether the Route contains placeholders of lazily restored leaves
+    _lazy = False
 
     @classmethod
     def set_sep(cls, sep='.'):
@@ -121,7 +574,7 @@ class Route(dict):
         key, rem = self.splitkey(key)
 
         if rem is None:
-            return super(Route, self).__getitem__(key)
+            return self._load(key, super(Route, self).__getitem__(key))
         else:
             if not hasattr(super(Route, self).__getitem__(key), '__getitem__'):
                 raise TypeError('\'{}\' object for key \'{}\' is not subscriptable'.format(type(super(Route, self).__getitem__(key)).__name__, key))
@@ -155,7 +608,7 @@ class Route(dict):
 
         # end of Route
         if rem is None:
-            return super(Route, self).get(key, default)
+            return self._load(key, super(Route, self).get(key, default))
         else:
             # not end of Route, check if the key exists
             tmp = super(Route, self).get(key, None)
@@ -178,7 +631,7 @@ class Route(dict):
 
         # end of Route
         if rem is None:
-            return super(Route, self).pop(key, default)
+            return self._load(None, super(Route, self).pop(key, default))
         else:
             tmp = super(Route, self).pop(key, None)
             if tmp is None:
@@ -191,6 +644,73 @@ class Route(dict):
 
         return default
 
+    def items(self):
+
+        if not self._lazy:
+            return super(Route, self).items()
+
+        return [(k, self._load(k, v)) for k, v in super(Route, self).items()]
+
+    def values(self):
+
+        if not self._lazy:
+            return super(Route, self).values()
+
+        return [self._load(k, v) for k, v in super(Route, self).items()]
+
+    def setdefault(self, key, default=None):
+
+        return self._load(key, super(Route, self).setdefault(key, default))
+
+    def popitem(self):
+
+        key, item = super(Route, self).popitem()
+
+        return key, self._load(None, item)
+
+    def copy(self):
+
+        if not self._lazy:
+            return super(Route, self).copy()
+
+        return dict(self.items())
+
+    def __eq__(self, other):
+
+        # compare the loaded leaves
+        if self._lazy:
+            return dict(self.items()) == other
+
+        if isinstance(other, Route) and other._lazy:
+            return other.__eq__(self)
+
+        return super(Route, self).__eq__(other)
+
+    def __ne__(self, other):
+
+        eq = self.__eq__(other)
+
+        return eq if eq is NotImplemented else (not eq)
+
+    __hash__ = None
+
+    def _load(self, key, item):
+        '''
+        Load the item if it is a placeholder of a lazily restored leaf
+        '''
+
+        if (not self._lazy) or (not isinstance(item, _LazyLeaf)):
+            return item
+
+        value = item.load()
+
+        # not cached by the zip source, keep the leaf in the Route
+        if (key is not None) and (item.source.cache_size is None):
+            super(Route, self).__setitem__(key, value)
+            item.source.loaded()
+
+        return value
+
     # === custom function ===
 
     def plain(self, sep=None):
@@ -225,24 +745,76 @@ class Route(dict):
         # AAA.BBB.DDD.item4: 40
         '''
 
+        return dict(self.iter_plain(sep=sep)).items()
+
+    def iter_plain(self, sep=None):
+        '''
+        Iterate over the items of the plain dict lazily, without
+        materializing the whole plain dict
+        '''
+
         if sep is None:
             sep = self._sep
 
-        d = {}
-        for k, v in self.items():
-            
-            if isinstance(v, Route):
-                # recursive call
-                for _k, _v in v.plain(sep=sep):
-                    d[sep.join([k, _k])] = _v
+        stack = [(None, self, iter(super(Route, self).items()))]
+
+        while stack:
+            prefix, node, itr = stack[-1]
+
+            for k, v in itr:
+                key = k if prefix is None else sep.join([prefix, k])
+
+                if isinstance(v, Route):
+                    # walk into the child, then come back to the rest of itr
+                    stack.append((key, v, iter(dict.items(v))))
+                    break
+
+                # load the leaves one at a time
+                yield key, node._load(k, v)
             else:
-                d[k] = v
+                stack.pop()
+
+    def _iter_archived(self, columnar=False):
+        '''
+        Iterate over the leaves to be archived, the keys are joined by '/'.
+        If columnar is True, the scalar leaves of each node are batched into
+        a columnar block, which is yielded before the other leaves.
+        '''
+
+        if not columnar:
+            yield from self.iter_plain('/')
+            return
+
+        def _items(node):
+            scalars = [(k, v) for k, v in dict.items(node) if _is_scalar(v)]
+
+            if len(scalars) < _COLUMNS_MIN:
+                return iter(dict.items(node))
+
+            others = [(k, v) for k, v in dict.items(node) if not _is_scalar(v)]
+
+            return iter([(_COLUMNS_KEY, _Columns(scalars))] + others)
+
+        stack = [(None, self, _items(self))]
+
+        while stack:
+            prefix, node, itr = stack[-1]
+
+            for k, v in itr:
+                key = k if prefix is None else '/'.join([prefix, k])
 
-        return d.items()
+                if isinstance(v, Route):
+                    stack.append((key, v, _items(v)))
+                    break
+
+                yield key, node._load(k, v)
+            else:
+                stack.pop()
 
     # === archive/restore ===
     
-    def _process_filename(self, filename, _type):
+    @staticmethod
+    def _process_filename(filename, _type):
         # filename
         if isinstance(filename, str):
             
@@ -273,7 +845,8 @@ class Route(dict):
             
         return filename, _type
         
-    def _file_context(self, filename, mode, **kwargs):
+    @staticmethod
+    def _file_context(filename, mode, **kwargs):
     
         # === import ===
         import zipfile
@@ -285,29 +858,420 @@ class Route(dict):
         else:
             return filename
 
-    def archive_zip(self, filename, mode='w', **kwargs):
+    def archive_zip(self, filename, mode='w', workers=None, mmap=False, incremental=False,
+                    columnar=False, **kwargs):
+        '''
+        Archive Route object to zip file
+
+        :param filename: (str or file pointer)
+        :param workers: if given, the leaves are serialized and compressed by
+                        a pool of threads, and written to the zip file in order.
+                        The timestamps of the entries are fixed, so the archive
+                        is the same with or without workers.
+        :param mmap: if True, the members which can be mapped into memory
+                        (e.g. .npy) are stored uncompressed and aligned, so
+                        that they can be restored with restore(..., mmap=True)
+        :param incremental: if True, only the leaves changed since the last
+                        incremental archive of filename are appended to it,
+                        along with a manifest of the content hashes of all
+                        leaves. Archive without incremental to compact it.
+                        The generation is appended to a copy of the archive,
+                        which then replaces it atomically, so a failed
+                        archive keeps the previous generations.
+        :param columnar: if True, the scalar leaves (int, float, bool, None
+                        and short str) of each node are batched into one
+                        member, instead of one member per leaf
+        '''
         
         # === import ===
         import zipfile
+
+        if incremental:
+            if workers is not None:
+                raise ValueError('Incremental archive does not support workers')
+
+            self._archive_zip_incremental(filename, mmap, columnar, **kwargs)
+            return
         
         with self._file_context(filename, mode, **kwargs) as zf:
-            for k, v in self.plain('/'):
 
-                # retrieve serializer and ext
-                serializer, ext = self._get_serializer_with_ext(type(v))
+            if workers is not None:
+                self._archive_zip_parallel(zf, workers, mmap, columnar)
+                return
+
+            # leaves are retrieved lazily, only one leaf is serialized at a time
+            for k, v in self._iter_archived(columnar):
+
+                # retrieve serializer, ext, streamer and compression policy
+                serializer, ext, streamer, compression = self._get_dispatch(type(v))
+
+                # the members to be mapped into memory are stored uncompressed and aligned
+                aligned = mmap and (ext in self._mmap_deserializer)
+
+                # serialize value, unless it is streamed
+                serialized_v = serializer(v) if streamer is None else None
+
+                self._write_leaf(zf, k+ext, v, streamer, serialized_v, aligned, compression)
+
+    @staticmethod
+    def _write_leaf(zf, name, v, streamer=None, serialized_v=None, aligned=False, compression=None):
+        '''
+        Write a leaf to the zip file, either streamed by the streamer or
+        from the serialized value
+        '''
+
+        # === import ===
+        import shutil
+        import zipfile
+        import tempfile
+
+        if isinstance(serialized_v, str):
+            serialized_v = serialized_v.encode('utf-8')
+
+        spool = None
+
+        # the size is unknown, spool the streamed value into a temporary file
+        # to tell whether zip64 is required, the same as the entries archived
+        # in parallel. The value stays in memory up to _CHUNK_SIZE.
+        if (streamer is not None) and (getattr(v, 'nbytes', None) is None):
+            spool = tempfile.SpooledTemporaryFile(max_size=_CHUNK_SIZE)
+            streamer(v, spool)
+            size = spool.tell()
+            spool.seek(0)
+
+        compress_type, compresslevel = zf.compression, getattr(zf, 'compresslevel', None)
+
+        # compression policy of the leaf, aligned members are always uncompressed
+        if (compression is not None) and (not aligned):
+            if compression != 'auto':
+                sample = None
+            elif spool is not None:
+                sample = spool.read(_PROBE_SIZE)
+                spool.seek(0)
+            elif streamer is not None:
+                sample = _probe_stream(streamer, v)
+            else:
+                sample = serialized_v
+
+            compress_type, compresslevel = _resolve_compression(compression, compress_type,
+                                                                compresslevel, sample)
+
+        # fixed timestamp, the same as the entries archived in parallel
+        zinfo = _entry_info(name, compress_type, compresslevel)
+
+        if spool is not None:
+            zip64 = size * 1.05 > zipfile.ZIP64_LIMIT
+            zinfo.file_size = size
+
+            if aligned:
+                zinfo = _aligned_info(name, zf.fp.tell(), zip64)
+
+            # copy spooled value into zip file
+            with spool, zf.open(zinfo, 'w', force_zip64=zip64) as fp:
+                shutil.copyfileobj(spool, fp, _CHUNK_SIZE)
+        elif streamer is not None:
+            # the size is nearly known before streaming, enable zip64 if it may be large
+            nbytes = getattr(v, 'nbytes', None)
+            force_zip64 = nbytes * 1.05 > zipfile.ZIP64_LIMIT
+
+            if aligned:
+                zinfo = _aligned_info(name, zf.fp.tell(), force_zip64)
+
+            # stream serialized value into zip file
+            with zf.open(zinfo, 'w', force_zip64=force_zip64) as fp:
+                streamer(v, fp)
+        else:
+            if aligned:
+                zip64 = len(serialized_v) * 1.05 > zipfile.ZIP64_LIMIT
+                zinfo = _aligned_info(name, zf.fp.tell(), zip64)
+
+            # write serialized value to zip file
+            zf.writestr(zinfo, serialized_v)
 
-                # serialize value
-                serialized_v = serializer(v)
+    def _archive_zip_incremental(self, filename, mmap=False, columnar=False, **kwargs):
 
-                # write serialized value to zip file
-                zf.writestr(k+ext, serialized_v)
+        # === import ===
+        import shutil
+        import zipfile
+
+        if not isinstance(filename, str):
+            raise ValueError('Incremental archive requires a filename')
+
+        # retrieve the leaves of the last generation
+        manifest = None
+        if os.path.isfile(filename) and zipfile.is_zipfile(filename):
+            with zipfile.ZipFile(filename, 'r') as zf:
+                manifest = self._read_manifest(zf)
+
+        if manifest is None:
+            # start a new archive
+            generation = 0
+            last = {}
+            mode = 'w'
+        else:
+            # append to the last generation
+            generation = manifest['generation'] + 1
+            # a columnar block and a leaf may share the key '.columns'
+            last = {(k, _is_columns(name)): (name, digest)
+                        for k, name, digest in manifest['leaves']}
+            mode = 'a'
+
+        # appending overwrites the central directory of the archive, append
+        # to a copy in the same directory and replace the archive atomically
+        tmp = '{}.{}.{}.tmp'.format(filename, os.getpid(), threading.get_ident())
+
+        try:
+            if mode == 'a':
+                shutil.copyfile(filename, tmp)
+
+            self._append_generation(tmp, mode, generation, last, mmap, columnar, **kwargs)
+
+            os.replace(tmp, filename)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _append_generation(self, filename, mode, generation, last, mmap=False,
+                            columnar=False, **kwargs):
+        '''
+        Write the changed leaves and the manifest of a generation of the
+        incremental archive
+        '''
+
+        # === import ===
+        import zipfile
+
+        leaves = []
+
+        with zipfile.ZipFile(filename, mode, **kwargs) as zf:
+            for k, v in self._iter_archived(columnar):
+
+                # retrieve serializer, ext, streamer and compression policy
+                serializer, ext, streamer, compression = self._get_dispatch(type(v))
+
+                # hash the serialized value
+                if streamer is not None:
+                    serialized_v = None
+                    hash_writer = _HashWriter()
+                    streamer(v, hash_writer)
+                    digest = hash_writer.hexdigest()
+                else:
+                    serialized_v = serializer(v)
+                    if isinstance(serialized_v, str):
+                        serialized_v = serialized_v.encode('utf-8')
+                    digest = hashlib.blake2b(serialized_v, digest_size=20).hexdigest()
+
+                name, last_digest = last.get((k, isinstance(v, _Columns)), (None, None))
+
+                # changed or added leaves, write to the members of this generation
+                if (digest != last_digest) or (not name.endswith(ext)):
+                    name = k+ext
+                    if generation > 0:
+                        name = '{}{}/{}'.format(_ZIP_ROUTE_DIR, generation, name)
+
+                    aligned = mmap and (ext in self._mmap_deserializer)
+                    self._write_leaf(zf, name, v, streamer, serialized_v, aligned, compression)
+
+                leaves.append([k, name, digest])
+
+            # removed leaves are simply not listed in the manifest
+            manifest = {'generation': generation, 'leaves': leaves}
+            zf.writestr('{}{}.json'.format(_ZIP_MANIFEST_DIR, generation),
+                        json.dumps(manifest))
+
+    def _archive_zip_parallel(self, zf, workers, mmap=False, columnar=False):
+
+        # === import ===
+        import zipfile
+        from concurrent.futures import ThreadPoolExecutor
+
+        compresslevel = getattr(zf, 'compresslevel', None)
+        # compress in the workers if the entries can be appended as they are
+        raw = _raw_writable(zf)
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for k, v in self._iter_archived(columnar):
+
+                # retrieve serializer, ext and compression policy
+                serializer, ext, _, policy = self._get_dispatch(type(v))
+
+                # the members to be mapped into memory are stored uncompressed and aligned
+                aligned = mmap and (ext in self._mmap_deserializer)
+
+                if aligned:
+                    compression, policy = zipfile.ZIP_STORED, None
+                else:
+                    compression = zf.compression
+
+                # serialize and compress value in the pool
+                future = executor.submit(_compress_entry, k+ext, serializer, v,
+                                            compression, compresslevel, policy, raw)
+                pending.append((future, aligned))
+
+                # write the finished entries in order, bound the number of entries in memory
+                while len(pending) > workers * 2:
+                    future, aligned = pending.popleft()
+                    _write_entry(zf, *future.result(), aligned=aligned)
+
+            while pending:
+                future, aligned = pending.popleft()
+                _write_entry(zf, *future.result(), aligned=aligned)
+
+    def archive_dir(self, filename, workers=None, columnar=False):
+        '''
+        Archive Route object to a directory, each leaf is written to a file
+        with the same layout as the zip archive. The files are replaced
+        atomically, and the files of the leaves removed since the last
+        archive are deleted. Files not listed in the index of the last
+        archive are never deleted.
+
+        :param filename: the name of the directory
+        :param workers: if given, the leaves are serialized and written by a
+                        pool of threads
+        :param columnar: if True, the scalar leaves of each node are batched
+                        into one file, see archive_zip
+        '''
+
+        os.makedirs(filename, exist_ok=True)
+
+        # the leaves of the last archive, only the indexed files are deleted
+        last = [name for _, name in (self._read_dir_index(filename) or [])]
+
+        members = []
+
+        def _archive_leaf(path, v, serializer, streamer):
+            # serialize value, unless it is streamed
+            serialized_v = serializer(v) if streamer is None else None
+
+            self._write_file(path, v, streamer, serialized_v)
+
+        if workers is not None:
+            # === import ===
+            from concurrent.futures import ThreadPoolExecutor
+
+            executor = ThreadPoolExecutor(max_workers=workers)
+        else:
+            executor = None
+
+        try:
+            futures = []
+
+            for k, v in self._iter_archived(columnar):
+
+                # retrieve serializer, ext, streamer and compression policy
+                serializer, ext, streamer, compression = self._get_dispatch(type(v))
+
+                members.append([k, k+ext])
+
+                # validate the name before anything is written
+                path = self._leaf_path(filename, k+ext)
+
+                if executor is not None:
+                    futures.append(executor.submit(_archive_leaf, path, v, serializer, streamer))
+                else:
+                    _archive_leaf(path, v, serializer, streamer)
+
+            # raise the exceptions of the workers
+            for future in futures:
+                future.result()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # write the index after all leaves are written
+        self._write_file(os.path.join(filename, _DIR_INDEX), None,
+                        serialized_v=json.dumps({'leaves': members}))
+
+        # delete the files of the removed leaves
+        names = set(name for _, name in members)
+
+        for name in last:
+            if name in names:
+                continue
+
+            # never delete the files outside the archive listed in a tampered index
+            try:
+                path = self._leaf_path(filename, name)
+            except ValueError:
+                continue
+
+            if os.path.isfile(path):
+                os.remove(path)
+
+            # delete the empty directories
+            path = os.path.dirname(path)
+            while os.path.abspath(path) != os.path.abspath(filename):
+                try:
+                    os.rmdir(path)
+                except OSError:
+                    break
+                path = os.path.dirname(path)
+
+    @staticmethod
+    def _leaf_path(root, name):
+        '''
+        Path of the file of the leaf in the directory archive, raise
+        ValueError if the name would escape the directory or clash with
+        its index
+        '''
+
+        parts = name.split('/')
+
+        for part in parts:
+            if ((part in ('', os.curdir, os.pardir)) or os.path.isabs(part) or
+                    (os.sep in part) or (os.altsep and os.altsep in part) or
+                    os.path.splitdrive(part)[0]):
+                raise ValueError('Invalid leaf name for a directory archive: {!r}'.format(name))
+
+        if parts[0] == os.path.dirname(_DIR_INDEX):
+            raise ValueError('Invalid leaf name for a directory archive: {!r}'.format(name))
+
+        path = os.path.join(root, *parts)
+
+        # symbolic links may still lead outside
+        real_root = os.path.realpath(root)
+        if os.path.commonpath([real_root, os.path.realpath(path)]) != real_root:
+            raise ValueError('Leaf {!r} is outside of the directory archive'.format(name))
+
+        return path
+
+    @staticmethod
+    def _write_file(path, v, streamer=None, serialized_v=None):
+        '''
+        Write a leaf to the file atomically, either streamed by the streamer
+        or from the serialized value
+        '''
+
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        tmp = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+
+        try:
+            with open(tmp, 'wb') as fp:
+                if streamer is not None:
+                    streamer(v, fp)
+                else:
+                    if isinstance(serialized_v, str):
+                        serialized_v = serialized_v.encode('utf-8')
+                    fp.write(serialized_v)
+
+            # replace the file atomically
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
 
     def archive(self, filename, _type=None, **kwargs):
         '''
         Archive Route object to the given zip type
 
         :param filename: the name of the archive file
-        :param _type: archive type, must be one of ['zip']
+        :param _type: archive type, must be one of ['zip', 'dir']
         '''
 
         filename, _type = self._process_filename(filename, _type)
@@ -315,15 +1279,39 @@ class Route(dict):
 
         if _type == '.zip':
             self.archive_zip(filename, **kwargs)
+        elif _type == '.dir':
+            self.archive_dir(filename, **kwargs)
         else:
             raise NotImplementedError('Method not implemented for archiving `{}` file'.format(_type))
 
     @classmethod
-    def restore_zip(self, filename, mode='r', **kwargs):
+    def restore_zip(self, filename, mode='r', lazy=False, cache_size=None, workers=None, mmap=False,
+                    include=None, exclude=None, **kwargs):
         '''
         Restore Route from zipped file
         
         :param filename: (str or file pointer)
+        :param lazy: if True, the Route is restored from the central directory
+                        immediately, and each leaf is read and deserialized on
+                        first access. Without cache_size, the zip file is
+                        closed once every leaf is loaded, otherwise it is kept
+                        open until the Route is released.
+        :param cache_size: (lazy only) the maximum total size (in bytes) of the
+                        accessed leaves to be cached, the least recently used
+                        leaves are evicted and reloaded on next access. If set
+                        to None, the accessed leaves are kept in the Route.
+        :param workers: if given, the members are read and deserialized by a
+                        pool of threads, while the Route is assembled in the
+                        calling thread in the same order as a serial restore.
+        :param mmap: if True, the uncompressed members which can be mapped
+                        into memory (e.g. .npy) are restored as read-only
+                        views over the archive file instead of being read.
+        :param include: (str or list) restore only the leaves matching any of
+                        the given path prefixes or glob patterns, e.g.
+                        'models/encoder' or 'models/*/weights' if sep is '/'.
+                        The patterns are matched segment by segment.
+        :param exclude: (str or list) skip the leaves matching any of the given
+                        path prefixes or glob patterns
         '''
         
         # === import ===
@@ -331,24 +1319,362 @@ class Route(dict):
 
         route = self()
 
+        if lazy:
+            zf = self._file_context(filename, mode, **kwargs)
+            source = _ZipSource(zf, self, cache_size, mmap,
+                                filename if isinstance(filename, str) else None)
+
+            members = self._select_members(self._zip_members(zf), include, exclude)
+
+            return self._restore_lazy(source, members, include, exclude)
+
         with self._file_context(filename, mode, **kwargs) as zf:
-            for name in zf.namelist():
-                if name.endswith('/'):
+            members = self._select_members(self._zip_members(zf), include, exclude)
+            names = [name for _, name in members]
+
+            if workers is not None:
+                # === import ===
+                from concurrent.futures import ThreadPoolExecutor
+
+                # read and deserialize members in the pool, values are yielded in order
+                executor = ThreadPoolExecutor(max_workers=workers)
+                values = executor.map(lambda name: self._restore_member(zf, name, mmap), names)
+            else:
+                executor = None
+                values = (self._restore_member(zf, name, mmap) for name in names)
+
+            try:
+                # assemble the tree in the calling thread
+                for (k, _), v in zip(members, values):
+                    self._assemble(route, k, v, include, exclude)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+        return route
+
+    @classmethod
+    def _assemble(self, route, k, v, include=None, exclude=None):
+        '''
+        Set a restored leaf to the Route, the columnar blocks are expanded
+        into the leaves matching include/exclude. The key of a block is the
+        key of its node.
+        '''
+
+        if not isinstance(v, _Columns):
+            route[k] = v
+            return
+
+        for name, value in v:
+            key = name if not k else self._sep.join([k, name])
+
+            if self._selected(key, include, exclude):
+                route[key] = value
+
+    @classmethod
+    def _restore_lazy(self, source, members, include=None, exclude=None):
+        '''
+        Create a Route with the placeholders of the leaves, the columnar
+        blocks are restored at once
+        '''
+
+        route = self()
+
+        for k, name in members:
+            if _is_columns(name):
+                self._assemble(route, k, source._restore(name), include, exclude)
+                continue
+
+            _, ext = os.path.splitext(name)
+
+            route[k] = _LazyLeaf(source, name, ext)
+            source.pending += 1
+
+        # nothing left to load
+        if not source.pending:
+            source.close()
+
+        # mark the nodes containing placeholders
+        stack = [route]
+        while stack:
+            node = stack.pop()
+            node._lazy = True
+            stack.extend(v for v in dict.values(node) if isinstance(v, Route))
+
+        return route
+
+    @classmethod
+    def _read_manifest(self, zf):
+        '''
+        Read the manifest of the last generation of an incremental archive,
+        return None if the archive is not incremental
+        '''
+
+        generations = [int(name[len(_ZIP_MANIFEST_DIR):-len('.json')])
+                        for name in zf.namelist() if name.startswith(_ZIP_MANIFEST_DIR)]
+
+        if not generations:
+            return None
+
+        name = '{}{}.json'.format(_ZIP_MANIFEST_DIR, max(generations))
+
+        return json.loads(zf.read(name).decode('utf-8'))
+
+    @classmethod
+    def _zip_members(self, zf):
+        '''
+        Retrieve the (key, name) of the leaves in the zip file, the keys
+        are joined by '/'
+        '''
+
+        manifest = self._read_manifest(zf)
+
+        # incremental archive, the leaves are listed in the manifest
+        if manifest is not None:
+            return [(k, name) for k, name, _ in manifest['leaves']]
+
+        return [(os.path.splitext(name)[0], name) for name in zf.namelist()
+                    if not name.endswith('/')]
+
+    @classmethod
+    def _select_members(self, members, include=None, exclude=None):
+        '''
+        Filter the (key, name) of the leaves by the path prefixes or glob
+        patterns written with the Route separator, return the (key, name)
+        with the keys joined by the Route separator. The columnar blocks are
+        kept with the keys of their nodes if any of their leaves may be
+        selected, and filtered on restore.
+        '''
+
+        selected = []
+        for k, name in members:
+
+            if _is_columns(name):
+                k = k.rpartition('/')[0].replace('/', self._sep)
+
+                # none of the leaves of the node is included
+                if (include is not None) and (not self._match_node(k, include)):
+                    continue
+
+                # the whole node is excluded
+                if k and (exclude is not None) and self._match(k, exclude):
                     continue
 
-                serialized_v = zf.open(name).read()
+                selected.append((k, name))
+                continue
+
+            k = k.replace('/', self._sep)
+
+            if self._selected(k, include, exclude):
+                selected.append((k, name))
+
+        return selected
+
+    @classmethod
+    def _selected(self, key, include=None, exclude=None):
+        '''
+        Whether the leaf is selected by include/exclude
+        '''
+
+        if (include is not None) and (not self._match(key, include)):
+            return False
+        if (exclude is not None) and self._match(key, exclude):
+            return False
+
+        return True
+
+    @classmethod
+    def _match(self, key, patterns):
+        '''
+        Whether the key matches any of the path prefixes or glob patterns.
+        The patterns are matched segment by segment, so that '*' never
+        matches across the separator.
+        '''
+
+        if isinstance(patterns, str):
+            patterns = [patterns]
+
+        path = key.split(self._sep)
+
+        for pattern in patterns:
+            pattern = pattern.split(self._sep)
 
-                k, ext = os.path.splitext(name)
-                k = k.replace('/', self._sep)
+            # the leaf itself or any leaf under the subtree
+            if (len(pattern) <= len(path) and
+                    all(fnmatch.fnmatchcase(k, p) for k, p in zip(path, pattern))):
+                return True
+        return False
+
+    @classmethod
+    def _match_node(self, node, patterns):
+        '''
+        Whether any leaf directly under the node may match the path
+        prefixes or glob patterns
+        '''
 
-                deserializer = self._get_deserializer(ext)
+        if isinstance(patterns, str):
+            patterns = [patterns]
 
-                v = deserializer(serialized_v)
+        path = node.split(self._sep) if node else []
 
-                route[k] = v
+        for pattern in patterns:
+            pattern = pattern.split(self._sep)
+
+            # the last segment of the pattern may match the name of the leaf
+            if (len(pattern) <= len(path) + 1 and
+                    all(fnmatch.fnmatchcase(k, p) for k, p in zip(path, pattern))):
+                return True
+        return False
+
+    @classmethod
+    def _restore_member(self, zf, name, mmap=False):
+        '''
+        Read and deserialize a member of the zip file
+        '''
+
+        # === import ===
+        import zipfile
+
+        _, ext = os.path.splitext(name)
+
+        # map the uncompressed member into memory if possible
+        if mmap and (ext in self._mmap_deserializer) and isinstance(getattr(zf, 'filename', None), str):
+            zinfo = zf.getinfo(name)
+
+            if zinfo.compress_type == zipfile.ZIP_STORED:
+                # skip the local file header
+                with open(zf.filename, 'rb') as fp:
+                    fp.seek(zinfo.header_offset)
+                    name_len, extra_len = struct.unpack('<HH', fp.read(30)[26:30])
+
+                offset = zinfo.header_offset + 30 + name_len + extra_len
+                v = self._mmap_deserializer[ext](zf.filename, offset)
+
+                # not mappable, fall back to the deserializer
+                if v is not None:
+                    return v
+
+        serialized_v = zf.open(name).read()
+
+        deserializer = self._get_deserializer(ext)
+
+        return deserializer(serialized_v)
+
+    @classmethod
+    def restore_dir(self, filename, lazy=False, cache_size=None, workers=None, mmap=False,
+                    include=None, exclude=None):
+        '''
+        Restore Route from directory, see restore_zip for the arguments.
+        With mmap=True, the leaves which can be mapped into memory (e.g.
+        .npy) are restored as read-only views over their files.
+        '''
+
+        if not os.path.isdir(filename):
+            raise FileNotFoundError('No such directory: \'{}\''.format(filename))
+
+        members = self._select_members(self._dir_members(filename), include, exclude)
+
+        if lazy:
+            source = _DirSource(filename, self, cache_size, mmap)
+
+            return self._restore_lazy(source, members, include, exclude)
+
+        names = [name for _, name in members]
+
+        if workers is not None:
+            # === import ===
+            from concurrent.futures import ThreadPoolExecutor
+
+            # read and deserialize files in the pool, values are yielded in order
+            executor = ThreadPoolExecutor(max_workers=workers)
+            values = executor.map(lambda name: self._restore_file(filename, name, mmap), names)
+        else:
+            executor = None
+            values = (self._restore_file(filename, name, mmap) for name in names)
+
+        route = self()
+
+        try:
+            # assemble the tree in the calling thread
+            for (k, _), v in zip(members, values):
+                self._assemble(route, k, v, include, exclude)
+        finally:
+            if executor is not None:
+                executor.shutdown()
 
         return route
 
+    @staticmethod
+    def _read_dir_index(root):
+        '''
+        Read the (key, name) of the leaves from the index of the directory
+        archive, return None if the directory has no index
+        '''
+
+        index = os.path.join(root, _DIR_INDEX)
+
+        if not os.path.isfile(index):
+            return None
+
+        with open(index, 'r') as fp:
+            return [tuple(member) for member in json.load(fp)['leaves']]
+
+    @classmethod
+    def _dir_members(self, root):
+        '''
+        Retrieve the (key, name) of the leaves in the directory archive,
+        the keys are joined by '/'
+        '''
+
+        members = self._read_dir_index(root)
+
+        if members is not None:
+            return members
+
+        # no index, walk the directory
+        members = []
+
+        for dirpath, dirnames, filenames in os.walk(root):
+            rel = os.path.relpath(dirpath, root)
+
+            if rel == os.curdir:
+                rel = ''
+                # skip the index
+                dirnames[:] = [d for d in dirnames if d != os.path.dirname(_DIR_INDEX)]
+
+            dirnames.sort()
+
+            for name in sorted(filenames):
+                name = '/'.join(rel.split(os.sep) + [name]) if rel else name
+                members.append((os.path.splitext(name)[0], name))
+
+        return members
+
+    @classmethod
+    def _restore_file(self, root, name, mmap=False):
+        '''
+        Read and deserialize a leaf of the directory archive
+        '''
+
+        path = self._leaf_path(root, name)
+
+        _, ext = os.path.splitext(name)
+
+        # map the file into memory if possible
+        if mmap and (ext in self._mmap_deserializer):
+            v = self._mmap_deserializer[ext](path, 0)
+
+            # not mappable, fall back to the deserializer
+            if v is not None:
+                return v
+
+        with open(path, 'rb') as fp:
+            serialized_v = fp.read()
+
+        deserializer = self._get_deserializer(ext)
+
+        return deserializer(serialized_v)
+
     @classmethod
     def restore(self, filename, _type=None, **kwargs):
         '''
@@ -362,6 +1688,8 @@ class Route(dict):
 
         if _type == '.zip':
             return self.restore_zip(filename, **kwargs)
+        elif _type == '.dir':
+            return self.restore_dir(filename, **kwargs)
         else:
             raise NotImplementedError('Method not implemented for restoring `{}` file'.format(_type))
 
@@ -372,6 +1700,14 @@ class Route(dict):
     _deserializer = {}
     _serialize_ext = {}
     _deserialize_ext = {}
+    _streamer = {}
+    _compression = {}
+    # class type -> (serializer, ext, streamer, compression), cleared when
+    # the registry changes
+    _dispatch_cache = {}
+    # ext -> function of (filename, offset) mapping the serialized value at
+    # offset of the file into memory, returns None if it is not mappable
+    _mmap_deserializer = {}
 
     @classmethod
     def serialize(self, value, class_type=None):
@@ -386,7 +1722,7 @@ class Route(dict):
         if class_type is None:
             class_type = type(value)
 
-        serializer, _ = self._get_serializer_with_ext(type(value))
+        serializer, _ = self._get_serializer_with_ext(class_type)
 
         return serializer(value)
 
@@ -413,16 +1749,44 @@ class Route(dict):
     @classmethod
     def _get_serializer_with_ext(self, class_type):
         # retrieve serializer and ext
-        serializer = self._serializer.get(class_type, None)
-        ext = self._serialize_ext.get(class_type, None)
-
-        # if serialize is None, then retrieve default serielizer and ext
-        if serializer is None:
-            serializer = self._serializer[Route]
-            ext = self._serialize_ext[Route]
+        serializer, ext, _, _ = self._get_dispatch(class_type)
 
         return serializer, ext
 
+    @classmethod
+    def _get_compression(self, class_type):
+        # retrieve compression policy
+        _, _, _, compression = self._get_dispatch(class_type)
+
+        return compression
+
+    @classmethod
+    def _get_dispatch(self, class_type):
+        '''
+        Retrieve (serializer, ext, streamer, compression) of class_type
+
+        The serializer of the nearest base class in the MRO of class_type
+        is used, like functools.singledispatch, or the default serializer
+        if none of them is defined. The result is memoized per class_type.
+        '''
+
+        dispatch = self._dispatch_cache.get(class_type, None)
+
+        if dispatch is None:
+            # find the nearest registered class
+            for base in getattr(class_type, '__mro__', (class_type,)):
+                if (base is not Route) and (base in self._serializer):
+                    break
+            else:
+                base = Route
+
+            dispatch = (self._serializer[base], self._serialize_ext[base],
+                        self._streamer.get(base, None), self._compression.get(base, None))
+
+            self._dispatch_cache[class_type] = dispatch
+
+        return dispatch
+
     @classmethod
     def _get_deserializer(self, ext):
         # retrieve class type by ext
@@ -438,7 +1802,18 @@ class Route(dict):
 
 
     @classmethod
-    def set_serializer(cls, class_type, serialize_func, ext, overwrite=False):
+    def set_serializer(cls, class_type, serialize_func, ext, overwrite=False, compression=None):
+        '''
+        Set the serializer of class_type
+
+        :param compression: the compression policy of the zip members of
+                        class_type. None to use the compression of the zip
+                        file, a compression method (e.g. zipfile.ZIP_STORED,
+                        zipfile.ZIP_LZMA), a tuple of (compression method,
+                        compresslevel), or 'auto' to store the members
+                        uncompressed if a quick probe shows that they do not
+                        compress well.
+        '''
 
         # check redefine
         if (class_type in cls._serializer) and (not overwrite):
@@ -448,9 +1823,23 @@ class Route(dict):
         if not ext.startswith('.'):
             ext = '.' + ext
 
+        # check reserved ext
+        if (ext == _COLUMNS_EXT) and (class_type is not _Columns):
+            raise RuntimeError('The extension `{}` is reserved for the columnar blocks'.format(ext))
+
         cls._serializer[class_type] = serialize_func
         cls._serialize_ext[class_type] = ext
 
+        # the streamer of the last serializer may not match
+        cls._streamer.pop(class_type, None)
+
+        if compression is not None:
+            cls._compression[class_type] = compression
+        else:
+            cls._compression.pop(class_type, None)
+
+        cls._dispatch_cache.clear()
+
     @classmethod
     def set_deserializer(cls, class_type, deserialize_func, ext, overwrite=False):
 
@@ -462,6 +1851,10 @@ class Route(dict):
         if not ext.startswith('.'):
             ext = '.' + ext
 
+        # check reserved ext
+        if (ext == _COLUMNS_EXT) and (class_type is not _Columns):
+            raise RuntimeError('The extension `{}` is reserved for the columnar blocks'.format(ext))
+
         # check whether ext is in use by other class
         if (ext in cls._deserialize_ext) and (not overwrite):
             raise RuntimeError('The extension `{}` is already in use by class `{}`'.format(ext, cls._deserialize_ext[ext].__name__))
@@ -471,7 +1864,30 @@ class Route(dict):
 
 
     @classmethod
-    def serializable(cls, ext, overwrite=False):
+    def set_streamer(cls, class_type, stream_func, overwrite=False):
+        '''
+        Set the streamer of class_type, which writes the serialized value
+        into a file object in chunks instead of returning it at once. The
+        output must be the same as the serializer of class_type, and the
+        streamer is removed when the serializer is set again.
+
+        :param stream_func: a function of (value, fp)
+        '''
+
+        # check serializer
+        if class_type not in cls._serializer:
+            raise RuntimeError('The serializer of class `{}` is not defined. Please define the serializer before the streamer'.format(class_type.__name__))
+
+        # check redefine
+        if (class_type in cls._streamer) and (not overwrite):
+            raise RuntimeError('The streamer of class `{}` is already defined. Please set overwrite=True to ignore this error'.format(class_type.__name__))
+
+        cls._streamer[class_type] = stream_func
+
+        cls._dispatch_cache.clear()
+
+    @classmethod
+    def serializable(cls, ext, overwrite=False, compression=None):
         '''
 
         Class decorator
@@ -500,9 +1916,9 @@ class Route(dict):
         '''
         def _cls_serializable(class_type):
             @staticmethod
-            def set_serializer(overwrite=overwrite):
+            def set_serializer(overwrite=overwrite, compression=compression):
                 def _serializer(func):
-                    cls.set_serializer(class_type, func, ext, overwrite)
+                    cls.set_serializer(class_type, func, ext, overwrite, compression)
                     class_type.serialize = staticmethod(func)
                     return func
                 return _serializer
@@ -525,7 +1941,7 @@ class Route(dict):
 
     # decorator
     @classmethod
-    def serializer(cls, class_type, ext, overwrite=False):
+    def serializer(cls, class_type, ext, overwrite=False, compression=None):
         '''
         Function decorator
 
@@ -542,7 +1958,7 @@ class Route(dict):
                 return serialized_value
         '''
         def _set_serializer(func):
-            cls.set_serializer(class_type, func, ext, overwrite)
+            cls.set_serializer(class_type, func, ext, overwrite, compression)
 
         return _set_serializer
 
@@ -566,17 +1982,40 @@ class Route(dict):
 
         return _set_deserializer
 
+    # decorator
+    @classmethod
+    def streamer(cls, class_type, overwrite=False):
+        '''
+        Function decorator
+
+        example usage:
+
+            @Route.streamer(MyList, overwrite=True)
+            def my_list_streamer(my_list, fp):
+
+                for chunk in my_list.my_serializing_method_in_chunks():
+                    fp.write(chunk)
+        '''
+        def _set_streamer(func):
+            cls.set_streamer(class_type, func, overwrite)
+
+        return _set_streamer
+
 
 # === global ===
 
-def set_default_serializer(serialize_func, ext, overwrite=False):
+def set_default_serializer(serialize_func, ext, overwrite=False, compression=None):
 
-    Route.set_serializer(Route, serialize_func, ext, overwrite)
+    Route.set_serializer(Route, serialize_func, ext, overwrite, compression)
 
 def set_default_deserializer(deserialize_func, ext, overwrite=False):
     
     Route.set_deserializer(Route, deserialize_func, ext, overwrite)
 
+def set_default_streamer(stream_func, overwrite=False):
+
+    Route.set_streamer(Route, stream_func, overwrite)
+
 
 
 '''
@@ -598,6 +2037,12 @@ except:
 set_default_serializer(pickle.dumps, '.pkl', overwrite=True)
 set_default_deserializer(pickle.loads, '.pkl', overwrite=True)
 
+# pickle the leaves into the zip file without the whole pickle in memory
+def pickle_streamer(value, fp):
+    pickle.dump(value, fp)
+
+set_default_streamer(pickle_streamer, overwrite=True)
+
 # === str ===
 
 @Route.serializer(str, ext='.txt', overwrite=True)
@@ -610,7 +2055,7 @@ def str_deserializer(serialized_string):
 
 # === bytes ===
 
-@Route.serializer(bytes, ext='.bytes', overwrite=True)
+@Route.serializer(bytes, ext='.bytes', overwrite=True, compression='auto')
 def bytes_serializer(byte_string):
     return byte_string
 
@@ -619,13 +2064,26 @@ def bytes_deserializer(serialized_byte_string):
     return serialized_byte_string
 
 
+# === columnar block ===
+
+@Route.serializer(_Columns, ext=_COLUMNS_EXT, overwrite=True)
+def columns_serializer(columns):
+    return json.dumps({'keys': [k for k, _ in columns],
+                       'values': [v for _, v in columns]})
+
+@Route.deserializer(_Columns, ext=_COLUMNS_EXT, overwrite=True)
+def columns_deserializer(serialized_columns):
+    columns = json.loads(serialized_columns)
+    return _Columns(zip(columns['keys'], columns['values']))
+
+
 # === numpy array ===
 
 try:
     import numpy as np
     import io
 
-    @Route.serializer(np.ndarray, ext='.npy', overwrite=True)
+    @Route.serializer(np.ndarray, ext='.npy', overwrite=True, compression='auto')
     def np_serializer(array):
         byte_fp = io.BytesIO()
         np.save(byte_fp, array)
@@ -638,5 +2096,51 @@ try:
         contents = np.load(byte_fp)
         return contents
 
+
+    @Route.streamer(np.ndarray, overwrite=True)
+    def np_streamer(array, fp):
+        # let numpy handle non-contiguous and object arrays
+        if (not array.flags.c_contiguous) or array.dtype.hasobject:
+            np.save(fp, array)
+            return
+
+        header = np.lib.format.header_data_from_array_1_0(array)
+        try:
+            np.lib.format.write_array_header_1_0(fp, header)
+        except ValueError:
+            # header is too large for version 1.0
+            np.lib.format.write_array_header_2_0(fp, header)
+
+        # write straight from the array buffer
+        buf = memoryview(array.reshape(-1).view(np.uint8))
+        for offset in range(0, len(buf), _CHUNK_SIZE):
+            fp.write(buf[offset:offset+_CHUNK_SIZE])
+
+
+    def np_mmap_deserializer(filename, offset):
+
+        with open(filename, 'rb') as fp:
+            fp.seek(offset)
+
+            # parse the .npy header
+            version = np.lib.format.read_magic(fp)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fp)
+            elif version == (2, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fp)
+            else:
+                return None
+
+            offset = fp.tell()
+
+        # object arrays and empty arrays can not be mapped
+        if dtype.hasobject or (0 in shape):
+            return None
+
+        return np.memmap(filename, dtype=dtype, mode='r', offset=offset,
+                            shape=shape, order='F' if fortran_order else 'C')
+
+    Route._mmap_deserializer['.npy'] = np_mmap_deserializer
+
 except:
     pass
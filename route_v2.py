@@ -1,23 +1,37 @@
 # --- built in ---
 import os
+import re
 import abc
 import sys
 import copy
+import json
+import mmap
 import time
+import zlib
+import codecs
+import pickle
+import io
+import struct
+import fnmatch
 import logging
+import functools
+import threading
+import contextlib
 
 from typing import Any
 from typing import Type
 from typing import Tuple
 from typing import Hashable
+from typing import Iterator
 from typing import NoReturn
 from typing import Optional
 
 from builtins import dict as _dict
 
-from collections import Iterable
-from collections import Mapping
 from collections import OrderedDict
+from collections.abc import Iterable
+from collections.abc import Mapping
+from collections.abc import MutableMapping
 
 
 # --- 3rd party ---
@@ -30,14 +44,29 @@ __all__ = [
     'set_sep',
     'enable_auto_convert',
     'disable_auto_convert',
+    'enable_lazy_convert',
+    'disable_lazy_convert',
     'Route',
     'OrderedRoute',
-    '_Route'
+    'FlatRoute',
+    'FrozenRoute',
+    'ConcurrentRoute',
+    'RouteArchive',
+    'open_archive',
+    '_Route',
+    '_FlatRoute',
+    '_ConcurrentRoute'
 ]
 
 _BASE_DICT = _dict
 _ROUTE_LIST = []
 _DEFAULT_SEP = '.'
+_PATH_CACHE_SIZE = 8192
+_LOCK_STRIPES = 64
+_NO_LOCK = contextlib.nullcontext()
+_MISSING = object()
+# leaves returned as they are by copy.deepcopy()
+_ATOMIC_TYPES = frozenset([type(None), bool, int, float, complex, str, bytes])
 
 def set_base_dict_type(DICT=_dict) -> NoReturn:
     '''
@@ -75,13 +104,44 @@ def disable_auto_convert() -> NoReturn:
     for routeclass in _ROUTE_LIST:
         routeclass.disable_auto_convert()
 
+def enable_lazy_convert() -> NoReturn:
+    '''
+    Enable lazy dict convertion, nested dicts are converted on first access
+    '''
+    global _ROUTE_LIST
+
+    for routeclass in _ROUTE_LIST:
+        routeclass.enable_lazy_convert()
+
+def disable_lazy_convert() -> NoReturn:
+    '''
+    Disable lazy dict convertion
+    '''
+    global _ROUTE_LIST
+
+    for routeclass in _ROUTE_LIST:
+        routeclass.disable_lazy_convert()
+
+
+@functools.lru_cache(maxsize=_PATH_CACHE_SIZE)
+def _compile_path(keys: str, sep: str) -> Tuple[str, ...]:
+    '''
+    Split keys into a tuple of path segments (LRU cached)
+    '''
+    return tuple(keys.split(sep))
+
 
 def _Route(_base_dict: Type[_BASE_DICT] =_BASE_DICT, 
            _base_meta: Type[abc.ABCMeta] =abc.ABCMeta, 
            sep: str =_DEFAULT_SEP, 
-           auto_cvt: bool =True) -> 'Route':
+           auto_cvt: bool =True,
+           frozen_type: type =None) -> 'Route':
     '''
     Create Route class
+
+    If frozen_type is given, freeze() returns it instead of the
+    FrozenRoute of the new class, so that Route classes can share one
+    frozen type.
     '''
     global _ROUTE_LIST
 
@@ -93,12 +153,21 @@ def _Route(_base_dict: Type[_BASE_DICT] =_BASE_DICT,
 
         _sep = '.'
         _auto_convert_dict = True
+        _lazy_convert_dict = False
+        # nodes are writable in place only if they share the token with
+        # their parent, see snapshot()
+        _cow_token = None
+        # FrozenRoutes raise on write paths, e.g. when they are assigned
+        # as they are with auto_convert_dict disabled
+        _frozen = False
 
         # === Main interfaces ===
 
         @classmethod
         def set_sep(cls, sep: str =_DEFAULT_SEP) -> NoReturn:
             cls._sep = sep or cls._sep
+            # drop compiled paths
+            _compile_path.cache_clear()
         
         @classmethod
         def enable_auto_convert(cls) -> NoReturn:
@@ -108,6 +177,14 @@ def _Route(_base_dict: Type[_BASE_DICT] =_BASE_DICT,
         def disable_auto_convert(cls) -> NoReturn:
             cls._auto_convert_dict = False
 
+        @classmethod
+        def enable_lazy_convert(cls) -> NoReturn:
+            cls._lazy_convert_dict = True
+
+        @classmethod
+        def disable_lazy_convert(cls) -> NoReturn:
+            cls._lazy_convert_dict = False
+
         @classmethod
         def splitkey(cls, key: str, sep: str =None) -> Tuple[str, Optional[str]]:
             sep = sep or cls._sep
@@ -120,6 +197,276 @@ def _Route(_base_dict: Type[_BASE_DICT] =_BASE_DICT,
             
             return key, None
 
+        @classmethod
+        def compilekey(cls, keys: Hashable, sep: str =None) -> Tuple[Hashable, ...]:
+            '''
+            Compile keys into a tuple of path segments
+
+            str keys are splitted by sep, tuple/list keys are treated as
+            already splitted paths, other keys are single segments.
+            '''
+            # only str can be splitted
+            if isinstance(keys, str):
+                return _compile_path(keys, sep or cls._sep)
+
+            if isinstance(keys, tuple):
+                path = keys
+            elif isinstance(keys, list):
+                path = tuple(keys)
+            else:
+                return (keys,)
+
+            if not path:
+                raise KeyError(keys)
+
+            return path
+
+        @classmethod
+        def _remainder(cls, keys: Hashable, path: Tuple[Hashable, ...], depth: int) -> Hashable:
+            '''
+            Remaining keys from path[depth], passed to non-Route nodes
+            '''
+            if depth == len(path)-1:
+                return path[depth]
+
+            # keep the addressing mode of the given keys
+            if isinstance(keys, str):
+                return cls._sep.join(path[depth:])
+
+            return path[depth:]
+
+        # === Path resolving ===
+
+        def _resolve(self, keys: Hashable, own: bool =False) -> Tuple[Any, Hashable]:
+            '''
+            Walk down the path in one pass, return (parent, key) of the
+            last path segment, or (_MISSING, None) if the path is broken.
+            If a non-Route node is reached, it is returned as the parent
+            along with the remaining keys. If own is True, the shared
+            nodes along the path are cloned (copy-on-write).
+            '''
+            # the empty path never exists
+            if isinstance(keys, (tuple, list)) and (not keys):
+                return _MISSING, None
+
+            path = self.compilekey(keys)
+            node = self
+
+            for depth in range(len(path)-1):
+                # not a Route, pass the remaining keys to it
+                if not isinstance(node, Route):
+                    return node, self._remainder(keys, path, depth)
+
+                parent, node = node, _base_dict.get(node, path[depth], _MISSING)
+
+                if node is _MISSING:
+                    return _MISSING, None
+
+                if parent._lazy_convert_dict:
+                    node = self._unfold(parent, path[depth], node)
+
+                if own:
+                    node = self._own(parent, path[depth], node)
+
+            return node, path[-1]
+
+        def _resolve_or_create(self, keys: Hashable) -> Tuple[Any, Hashable]:
+            '''
+            Same as _resolve, but missing nodes are created along the way
+            '''
+            path = self.compilekey(keys)
+            node = self
+
+            for depth in range(len(path)-1):
+                # not a Route, pass the remaining keys to it
+                if not isinstance(node, Route):
+                    return node, self._remainder(keys, path, depth)
+
+                node = self._descend(node, path[depth])
+
+            return node, path[-1]
+
+        @staticmethod
+        def _descend(node: 'Route', key: Hashable) -> Any:
+            '''
+            Retrieve node[key] for writing, missing nodes are created and
+            non-Route nodes are converted (if auto_convert_dict is enabled)
+            '''
+            child = _base_dict.get(node, key, _MISSING)
+            # --- handle key ---
+            # key does not exist, create new
+            if child is _MISSING:
+                child = type(node)()
+
+            # key exists, but value is not an instance of Route. Overwrite if self._auto_convert_dict == True
+            elif node._auto_convert_dict and (not isinstance(child, type(node))):
+                # if it is an instance of Mapping, convert to Route
+                if isinstance(child, Mapping):
+                    child = type(node)(child)
+                # if not, replace it by Route()
+                else:
+                    child = type(node)()
+
+            # key exists, clone it if it is shared
+            else:
+                if getattr(child, '_frozen', False):
+                    child._immutable()
+                return Route._own(node, key, child)
+
+            # new nodes are owned by the same tree
+            if node._cow_token is not None:
+                child._cow_token = node._cow_token
+
+            _base_dict.__setitem__(node, key, child)
+            return child
+
+        @staticmethod
+        def _own(node: 'Route', key: Hashable, child: Any) -> Any:
+            '''
+            Copy-on-write, clone node[key] if it is shared with other Routes
+            '''
+            if isinstance(child, Route) and (child._cow_token is not node._cow_token):
+                clone = type(child)()
+                _base_dict.update(clone, child)
+                clone._cow_token = node._cow_token
+                _base_dict.__setitem__(node, key, clone)
+                child = clone
+
+            return child
+
+        def _expose(self, keys: Hashable, item: Any) -> Any:
+            '''
+            Own the subtree before returning it, so that it can not be
+            modified through the Routes sharing it
+            '''
+            if isinstance(item, Route) and (item._cow_token is not self._cow_token):
+                parent, key = self._resolve(keys, own=True)
+                if isinstance(parent, Route):
+                    item = self._own(parent, key, item)
+
+            return item
+
+        def _resolve_prefix(self, prefix: Tuple[Hashable, ...], cache: dict, create: bool =False) -> Any:
+            '''
+            Resolve the node at prefix, starting from the deepest node
+            resolved by previous calls sharing the same cache. Return
+            _MISSING if it does not exist. If a non-Route node is reached,
+            it is returned instead.
+            '''
+            depth = len(prefix)
+            # the root is always cached, cache[()] = self
+            while prefix[:depth] not in cache:
+                depth -= 1
+
+            node = cache[prefix[:depth]]
+
+            while depth < len(prefix) and isinstance(node, Route):
+                if create:
+                    node = self._descend(node, prefix[depth])
+                else:
+                    node = self._lookup(node, prefix[depth])
+                depth += 1
+                cache[prefix[:depth]] = node
+
+            return node
+
+        @staticmethod
+        def _invalidate_prefix(path: Tuple[Hashable, ...], cache: dict) -> NoReturn:
+            '''
+            Drop the cached nodes under path, after path is replaced or deleted
+            '''
+            if path in cache:
+                for prefix in [p for p in cache if p[:len(path)] == path]:
+                    del cache[prefix]
+
+        @staticmethod
+        def _pending(node: 'Route', item: Any) -> bool:
+            '''
+            Whether item is a Mapping waiting for lazy conversion
+            '''
+            return (node._lazy_convert_dict and node._auto_convert_dict and
+                    isinstance(item, Mapping) and (not isinstance(item, Route)))
+
+        @staticmethod
+        def _unfold(node: 'Route', key: Hashable, item: Any) -> Any:
+            '''
+            Convert node[key] into Route if it is waiting for lazy conversion
+            '''
+            if Route._pending(node, item):
+                item = type(node)(item)
+                _base_dict.__setitem__(node, key, item)
+
+            return item
+
+        def _unfold_all(self) -> NoReturn:
+            '''
+            Convert all children waiting for lazy conversion
+            '''
+            for key, item in list(_base_dict.items(self)):
+                self._unfold(self, key, item)
+
+        @staticmethod
+        def _lookup(parent: Any, key: Hashable) -> Any:
+            '''
+            Retrieve parent[key], return _MISSING if it does not exist
+            '''
+            if isinstance(parent, Route):
+                item = _base_dict.get(parent, key, _MISSING)
+
+                if parent._lazy_convert_dict and (item is not _MISSING):
+                    item = parent._unfold(parent, key, item)
+
+                return item
+
+            if (parent is _MISSING or
+                    (not hasattr(parent, '__contains__')) or
+                    (not parent.__contains__(key))):
+                return _MISSING
+
+            return parent[key]
+
+        @staticmethod
+        def _assign(parent: Any, key: Hashable, item: Any, pending: list =None) -> Any:
+            '''
+            Set parent[key] = item, return the stored item
+
+            If pending is given, Mappings are replaced by empty Routes and
+            appended to pending as (Route, Mapping) to be filled later.
+            '''
+            if not isinstance(parent, Route):
+                parent[key] = item
+                return item
+
+            if parent._frozen:
+                parent._immutable()
+
+            # convert dict object to Route (if auto_convert_dict is enabled),
+            # the conversion of plain Mappings is deferred if lazy_convert_dict is enabled
+            if (parent._auto_convert_dict and isinstance(item, Mapping) and
+                    not (parent._lazy_convert_dict and not isinstance(item, Route))):
+                if pending is None:
+                    item = type(parent)._convert(item)
+                else:
+                    pending.append((type(parent)(), item))
+                    item = pending[-1][0]
+
+            _base_dict.__setitem__(parent, key, item)
+            return item
+
+        @classmethod
+        def _convert(cls, item: Mapping) -> 'Route':
+            '''
+            Convert a nested Mapping into Route without recursion
+            '''
+            root = cls()
+            pending = [(root, item)]
+
+            while pending:
+                node, item = pending.pop()
+                node._set_many(item, pending)
+
+            return root
+
         # === Override dict ===
 
         def __init__(self, *args, **kwargs) -> NoReturn:
@@ -132,142 +479,858 @@ def _Route(_base_dict: Type[_BASE_DICT] =_BASE_DICT,
                 raise TypeError('dict expected at most 1 arguments, got {}'.format(len(args)))
             elif len(args) == 1:
 
-                it = args[0]
                 if isinstance(args[0], Mapping):
                     itr = iter(args[0].items())
                 else:
                     itr = iter(args[0])
-                
-                for k, v in itr:
-                    # convert dict object to Route (if auto_convert_dict is enabled)
-                    if self._auto_convert_dict and isinstance(v, Mapping):
-                        self.__setitem__(k, Route(v))
-                    else:
-                        self.__setitem__(k, v)
+
+                self.set_many(itr)
 
             if len(kwargs) > 0:
                 self.update(kwargs)
         
         def __setitem__(self, keys: str, item: Any) -> NoReturn:
 
-            key, rem = self.splitkey(keys)
+            self._assign(*self._resolve_or_create(keys), item)
 
-            if rem is None:
-                if self._auto_convert_dict and isinstance(item, Mapping):
-                    super(Route, self).__setitem__(key, Route(item))
-                else:
-                    super(Route, self).__setitem__(key, item)
-            else:
-                # --- handle key ---
-                # key does not exist, create new
-                if key not in super(Route, self).keys():
-                    super(Route, self).__setitem__(key, Route())
-
-                # key exists, but value is not an instance of Route. Overwrite if self._auto_convert_dict == True
-                elif self._auto_convert_dict and (not isinstance(super(Route, self).__getitem__(key), type(self))):
-                    # if it is an instance of Mapping, convert to Route
-                    if isinstance(super(Route, self).__getitem__(key), Mapping):
-                        super(Route, self).__setitem__(key, type(self)(super(Route, self).__getitem__(key)))
-                    # if not, replace it by Route()
-                    else:
-                        super(Route, self).__setitem__(key, type(self)())
+        def __getitem__(self, keys: Hashable) -> Any:
 
-                # --- handle rem ---
-                # convert dict object to Route (if auto_convert_dict is enabled)
-                super(Route, self).__getitem__(key).__setitem__(rem, item)
+            path = self.compilekey(keys)
+            node = self
 
-        def __getitem__(self, keys: Hashable) -> Any:
-            
-            key, rem = self.splitkey(keys)
+            for depth, key in enumerate(path):
+                # not a Route, pass the remaining keys to it
+                if not isinstance(node, Route):
+                    return node[self._remainder(keys, path, depth)]
 
-            if rem is None:
-                return super(Route, self).__getitem__(key)
-            else:
-                return super(Route, self).__getitem__(key)[rem]
+                parent, node = node, _base_dict.__getitem__(node, key)
+
+                if parent._lazy_convert_dict:
+                    node = self._unfold(parent, key, node)
+
+            return self._expose(keys, node)
 
         def __delitem__(self, keys: Hashable) -> NoReturn:
 
-            key, rem = self.splitkey(keys)
+            self._delete(*self._resolve(keys, own=True), keys)
 
-            if rem is None:
-                super(Route, self).__delitem__(key)
-            else:
-                del super(Route, self).__getitem__(key)[rem]
+        @staticmethod
+        def _delete(parent: Any, key: Hashable, keys: Hashable) -> NoReturn:
 
+            if parent is _MISSING:
+                raise KeyError(keys)
+            elif isinstance(parent, Route):
+                if parent._frozen:
+                    parent._immutable()
+                _base_dict.__delitem__(parent, key)
+            else:
+                del parent[key]
 
         def __contains__(self, keys: Hashable) -> bool:
 
-            key, rem = self.splitkey(keys)
+            parent, key = self._resolve(keys)
 
-            if rem is None:
-                return super(Route, self).__contains__(key)
-            else:
-                return (super(Route, self).__contains__(key) and
-                        hasattr(super(Route, self).__getitem__(key), '__contains__') and
-                        super(Route, self).__getitem__(key).__contains__(rem))
+            if isinstance(parent, Route):
+                return _base_dict.__contains__(parent, key)
+
+            return (parent is not _MISSING and
+                    hasattr(parent, '__contains__') and
+                    parent.__contains__(key))
 
         def get(self, keys: Hashable, default: Any =None) -> Any:
 
-            if self.__contains__(keys):
-                return self.__getitem__(keys)
-            else:
-                return default
+            item = self._lookup(*self._resolve(keys))
+
+            return default if item is _MISSING else self._expose(keys, item)
 
         def pop(self, keys: Hashable, default: Any =None) -> Any:
 
-            if self.__contains__(keys):
-                item = self.__getitem__(keys)
-                self.__delitem__(keys)
+            return self._pop(*self._resolve(keys, own=True), default)
+
+        @staticmethod
+        def _pop(parent: Any, key: Hashable, default: Any =None) -> Any:
+
+            if isinstance(parent, Route):
+                if parent._frozen:
+                    parent._immutable()
+                item = _base_dict.pop(parent, key, default)
+
+                if Route._pending(parent, item):
+                    item = type(parent)(item)
+
+                # still shared with other Routes
+                elif isinstance(item, Route) and (item._cow_token is not parent._cow_token):
+                    item = item.snapshot()
+
                 return item
-            else:
+
+            item = Route._lookup(parent, key)
+
+            if item is _MISSING:
                 return default
 
+            del parent[key]
+            return item
+
+        def setdefault(self, keys: Hashable, default: Any =None) -> Any:
+
+            item = self._setdefault(*self._resolve_or_create(keys), default)
+
+            return self._expose(keys, item)
+
+        def _setdefault(self, parent: Any, key: Hashable, default: Any =None) -> Any:
+
+            item = self._lookup(parent, key)
+
+            if item is _MISSING:
+                self._assign(parent, key, default)
+                # unfolded as if it were looked up
+                item = self._lookup(parent, key)
+
+            return item
+
+        # === Batch interfaces ===
+
+        def set_many(self, items: Iterable) -> NoReturn:
+            '''
+            Set multiple items at once
+
+            items can be a Mapping or an iterable of (keys, item) pairs.
+            The items are set in the given order, while the intermediate
+            nodes shared by the paths are resolved only once per batch.
+            '''
+            self._set_many(items)
+
+        def _set_many(self, items: Iterable, pending: list =None, cache: dict =None) -> NoReturn:
+
+            if isinstance(items, Mapping):
+                items = items.items()
+
+            if cache is None:
+                cache = {(): self}
+            compilekey = self.compilekey
+            assign = self._assign
+
+            for keys, item in items:
+                path = compilekey(keys)
+
+                # fast path for single keys
+                if len(path) == 1:
+                    parent = self
+                else:
+                    parent = self._resolve_prefix(path[:-1], cache, create=True)
+
+                    # not a Route, fall back to the regular path
+                    if not isinstance(parent, Route):
+                        self.__setitem__(keys, item)
+                        continue
+
+                if path in cache:
+                    self._invalidate_prefix(path, cache)
+
+                assign(parent, path[-1], item, pending)
+
+        def get_many(self, keys: Iterable, default: Any =None) -> list:
+            '''
+            Get multiple items at once, return a list of items in the
+            given order. default is returned for missing keys.
+            '''
+            cache = {(): self}
+            items = []
+
+            for key in keys:
+                path = self.compilekey(key)
+                parent = self._resolve_prefix(path[:-1], cache)
+
+                # not a Route, fall back to the regular path
+                if (parent is not _MISSING) and (not isinstance(parent, Route)):
+                    items.append(self.get(key, default))
+                    continue
+
+                item = self._lookup(parent, path[-1])
+                items.append(default if item is _MISSING else self._expose(key, item))
+
+            return items
+
+        def delete_many(self, keys: Iterable) -> NoReturn:
+            '''
+            Delete multiple items at once. All keys are resolved before
+            deleting any of them, and nothing is deleted if any of the
+            keys does not exist, raising KeyError.
+            '''
+            self._delete_many(keys)
+
+        def _delete_many(self, keys: Iterable, cache: dict =None) -> NoReturn:
+
+            keys = list(keys)
+
+            if cache is None:
+                cache = {(): self}
+
+            # check all keys first, including the ones deleted twice or
+            # under another deleted key
+            deleted = set()
+
+            for key in keys:
+                path = self.compilekey(key)
+                parent = self._resolve_prefix(path[:-1], cache)
+
+                if any(path[:depth] in deleted for depth in range(1, len(path)+1)):
+                    raise KeyError(key)
+
+                if isinstance(parent, Route):
+                    if not _base_dict.__contains__(parent, path[-1]):
+                        raise KeyError(key)
+                    if parent._frozen and (parent._cow_token is self._cow_token):
+                        parent._immutable()
+                elif parent is _MISSING:
+                    raise KeyError(key)
+                else:
+                    # not a Route, only Mappings can be checked ahead
+                    parent, k = self._resolve(key)
+                    if isinstance(parent, Mapping) and (not parent.__contains__(k)):
+                        raise KeyError(key)
+
+                deleted.add(path)
+
+            # the nodes resolved above are still cached
+            for key in keys:
+                path = self.compilekey(key)
+                parent = self._resolve_prefix(path[:-1], cache)
+
+                # not a Route or shared with other Routes, fall back to the regular path
+                if (parent is not _MISSING) and ((not isinstance(parent, Route)) or
+                                                 (parent._cow_token is not self._cow_token)):
+                    self.__delitem__(key)
+                    # the nodes may have been cloned
+                    cache.clear()
+                    cache[()] = self
+                    continue
+
+                if (parent is _MISSING) or (not _base_dict.__contains__(parent, path[-1])):
+                    raise KeyError(key)
+
+                if parent._frozen:
+                    parent._immutable()
+                self._invalidate_prefix(path, cache)
+                _base_dict.__delitem__(parent, path[-1])
+
+        def _own_all(self) -> NoReturn:
+            '''
+            Own all children shared with other Routes, so that they can
+            be handed out like __getitem__ does
+            '''
+            # nodes outside of snapshots never share their children
+            if self._cow_token is None:
+                return
+
+            for key, item in list(_base_dict.items(self)):
+                self._own(self, key, item)
+
+        def _items(self):
+            '''
+            items() without owning the shared children, for read-only
+            traversals
+            '''
+            if self._lazy_convert_dict:
+                self._unfold_all()
+
+            return _base_dict.items(self)
+
+        def items(self):
+
+            if self._lazy_convert_dict:
+                self._unfold_all()
+
+            self._own_all()
+
+            return _base_dict.items(self)
+
+        def values(self):
+
+            if self._lazy_convert_dict:
+                self._unfold_all()
+
+            self._own_all()
+
+            return _base_dict.values(self)
+
+        def __eq__(self, other: Any) -> bool:
+
+            # fast path, the base dict comparison recurses into children
+            if not self._lazy_convert_dict:
+                try:
+                    return _base_dict.__eq__(self, other)
+                except RecursionError:
+                    pass
+
+            if not isinstance(other, Mapping):
+                return NotImplemented
+
+            # compare Route nodes without recursion
+            stack = [(self, other)]
+
+            while stack:
+                node, other = stack.pop()
+
+                if len(node) != len(other):
+                    return False
+
+                for k, v in node._items():
+                    w = self._lookup(other, k)
+
+                    if w is _MISSING:
+                        return False
+                    elif isinstance(v, Route) and isinstance(w, Mapping):
+                        stack.append((v, w))
+                    elif v != w:
+                        return False
+
+            return True
+
+        def __repr__(self) -> str:
+
+            # fast path, the base dict repr recurses into children
+            try:
+                return _base_dict.__repr__(self)
+            except RecursionError:
+                pass
+
+            # format nested dicts without recursion, like dict
+            chunks = ['{']
+            stack = [(self, iter(_dict.items(self)))]
+            active = {id(self)}
+            first = True
+
+            while stack:
+                node, items = stack[-1]
+
+                for k, v in items:
+                    chunks.append('{!r}: '.format(k) if first else ', {!r}: '.format(k))
+                    first = False
+
+                    if isinstance(v, _dict) and (id(v) not in active):
+                        active.add(id(v))
+                        stack.append((v, iter(_dict.items(v))))
+                        chunks.append('{')
+                        first = True
+                        break
+
+                    chunks.append('{...}' if isinstance(v, _dict) else repr(v))
+                else:
+                    stack.pop()
+                    active.discard(id(node))
+                    chunks.append('}')
+                    first = False
+
+            return ''.join(chunks)
+
+        def __ne__(self, other: Any) -> bool:
+
+            eq = self.__eq__(other)
+
+            return eq if eq is NotImplemented else (not eq)
+
         def __copy__(self) -> __qualname__:
 
             ndict = type(self)()
 
-            for k, v in self.items():
+            # pending Mappings are never mutated in place, so they can be shared
+            for k, v in _base_dict.items(self):
                 super(Route, ndict).__setitem__(k, v)
 
             return ndict
 
+        def snapshot(self) -> __qualname__:
+            '''
+            Create a copy-on-write snapshot of this Route
+
+            The snapshot shares all subtrees with this Route, the nodes
+            along a path are cloned when the path is first written through
+            either of them. Like __getitem__, items() and values() clone the
+            shared children before returning them. Leaves are shared as
+            they are.
+            '''
+            ndict = type(self)()
+            _base_dict.update(ndict, self)
+
+            # neither of them owns the shared subtrees anymore
+            self._cow_token = object()
+            ndict._cow_token = object()
+
+            return ndict
+
+        def freeze(self) -> 'FrozenRoute':
+            '''
+            Create an immutable, hashable copy of this Route
+            '''
+            # collect nodes, parents before children
+            nodes = [self]
+            for node in nodes:
+                nodes.extend(v for _, v in node._items()
+                             if isinstance(v, Route) and (not isinstance(v, FrozenRoute)))
+
+            # freeze nodes, children before parents
+            frozen = {}
+            for node in reversed(nodes):
+                frozen[id(node)] = FrozenRoute._make(
+                    (k, frozen.get(id(v), v)) for k, v in _base_dict.items(node))
+
+            return frozen[id(self)]
+
         def __deepcopy__(self, memo) -> __qualname__:
 
             ndict = type(self)()
+            memo[id(self)] = ndict
+
+            deepcopy = copy.deepcopy
+            setitem = _base_dict.__setitem__
+
+            # copy Route nodes without recursion
+            stack = [(ndict, self)]
+
+            while stack:
+                target, node = stack.pop()
+
+                for k, v in _base_dict.items(node):
+                    # skip copy.deepcopy() for the most common leaves
+                    if type(v) in _ATOMIC_TYPES:
+                        pass
+                    # checking the base dict first is much cheaper for leaves
+                    elif not (isinstance(v, _base_dict) and isinstance(v, Route)):
+                        v = deepcopy(v, memo)
+                    elif id(v) in memo:
+                        v = memo[id(v)]
+                    else:
+                        stack.append((type(v)(), v))
+                        v = memo[id(v)] = stack[-1][0]
 
-            for k, v in self.items():
-                super(Route, ndict).__setitem__(k, copy.deepcopy(v, memo))
+                    setitem(target, k, v)
 
             return ndict
 
 
         # === custim function ===
 
+        def walk(self) -> Iterator[Tuple[Tuple[Hashable, ...], 'Route']]:
+            '''
+            Iterate over (path, node) of all Route nodes, including this
+            Route itself, parents before children
+            '''
+            stack = [((), self)]
+
+            while stack:
+                prefix, node = stack.pop()
+                yield prefix, node
+                # pushed in reversed order to keep the insertion order
+                stack.extend(reversed([(prefix + (k,), v) for k, v in node.items()
+                                       if isinstance(v, type(self))]))
+
+        def iter_leaves(self, sep: str =None) -> Iterator[Tuple[Hashable, Any]]:
+            '''
+            Iterate over (path, item) of all leaves in depth-first order
+
+            Paths are tuples of keys, or strings joined by sep if sep is
+            given. Non-str keys are joined as str, except the keys of the
+            leaves directly under this Route, which are kept as they are.
+            '''
+            # keys from this Route to the current node, the path of the
+            # current node is built only when it has leaves
+            keys = []
+            prefix = None
+            stack = [iter(self._items())]
+
+            while stack:
+                for k, v in stack[-1]:
+                    if isinstance(v, type(self)):
+                        keys.append(k)
+                        stack.append(iter(v._items()))
+                        prefix = None
+                        break
+
+                    if prefix is None:
+                        prefix = tuple(keys) if sep is None else sep.join(map(str, keys))
+
+                    if sep is None:
+                        yield prefix + (k,), v
+                    elif keys:
+                        yield prefix + sep + str(k), v
+                    else:
+                        yield k, v
+                else:
+                    stack.pop()
+                    if keys:
+                        keys.pop()
+                    prefix = None
+
         def plain(self, sep: str =None) -> _base_dict:
-            
-            sep = sep or self._sep
 
-            d = _base_dict()
+            return _base_dict(self.iter_leaves(sep=sep or self._sep))
+
+        def to_base(self) -> _base_dict:
+
+            cls = type(self)
+            base = _base_dict(self._items())
+
+            # convert Route nodes without recursion
+            stack = [base]
+
+            while stack:
+                node = stack.pop()
+
+                for k, v in node.items():
+                    # replacing values does not break the iteration
+                    if isinstance(v, cls):
+                        node[k] = _base_dict(v._items())
+                        stack.append(node[k])
+
+            return base
+
+        @classmethod
+        def _from_pairs(cls, pairs: list) -> Any:
+            '''
+            object_pairs_hook of the decoders, build a Route node from the
+            (key, item) pairs of an object whose children are already built
+            '''
+            # keep nested objects as they are, like Route(dict)
+            if not cls._auto_convert_dict:
+                return _base_dict(pairs)
+
+            node = cls()
+
+            for k, v in pairs:
+                # str keys containing sep are paths, like Route(dict)
+                if isinstance(k, str) and (cls._sep in k):
+                    parent, k = node._resolve_or_create(k)
+                else:
+                    parent = node
+
+                if isinstance(parent, Route):
+                    _base_dict.__setitem__(parent, k, v)
+                else:
+                    parent[k] = v
+
+            return node
+
+        @classmethod
+        def _from_document(cls, doc: Any) -> __qualname__:
+
+            if isinstance(doc, cls):
+                return doc
+            elif isinstance(doc, Mapping):
+                return cls(doc)
 
-            for k, v in self.items():
+            raise TypeError('Expecting an object at the top level, got \'{}\''.format(
+                                type(doc).__name__))
 
-                if isinstance(v, type(self)):
-                    # recursive call
-                    for _k, _v in v.plain(sep=sep).items():
-                        d[sep.join([k, _k])] = _v
+        @classmethod
+        def from_json(cls, s: Any, **kwargs) -> __qualname__:
+            '''
+            Load Route from JSON str, bytes or a file object
+
+            The objects are built into Route nodes by the decoder while
+            parsing, instead of being converted after the whole document
+            is parsed. Unlike Route(dict), the objects nested in arrays
+            are Route as well. kwargs are passed to json.loads.
+            '''
+            if hasattr(s, 'read'):
+                s = s.read()
+
+            try:
+                doc = json.loads(s, object_pairs_hook=cls._from_pairs, **kwargs)
+            except RecursionError:
+                # too deep for the decoder, decode the objects one by one
+                if isinstance(s, (bytes, bytearray)):
+                    s = s.decode(json.detect_encoding(s), 'surrogatepass')
+
+                reader = _JSONReader(io.StringIO(s))
+                reader.raw_decode = json.JSONDecoder(object_pairs_hook=cls._from_pairs,
+                                                     **kwargs).raw_decode
+                doc = _load_json_objects(reader, cls._from_pairs)
+                reader.end()
+
+            return cls._from_document(doc)
+
+        @classmethod
+        def from_msgpack(cls, data: Any, **kwargs) -> __qualname__:
+            '''
+            Load Route from msgpack bytes or a file object, see from_json.
+            msgpack is required. kwargs are passed to msgpack.unpackb.
+            '''
+            import msgpack
+
+            if hasattr(data, 'read'):
+                data = data.read()
+
+            kwargs.setdefault('raw', False)
+
+            return cls._from_document(msgpack.unpackb(data, object_pairs_hook=cls._from_pairs, **kwargs))
+
+        def to_json(self, fp: Any =None, **kwargs) -> Optional[str]:
+            '''
+            Dump Route into JSON without converting it by to_base()
+
+            If fp is given, the output is written to fp chunk by chunk, so
+            that the whole document is never held in memory. Otherwise it
+            is returned as str. kwargs are passed to json.JSONEncoder.
+            '''
+            default = kwargs.pop('default', None)
+
+            def _default(item: Any) -> Any:
+                # base dicts other than dict, one node at a time
+                if isinstance(item, Mapping):
+                    return _dict(item.items())
+                elif default is not None:
+                    return default(item)
+
+                raise TypeError('Object of type {} is not JSON serializable'.format(
+                                    type(item).__name__))
+
+            encoder = json.JSONEncoder(default=_default, **kwargs)
+
+            # fast path, the C encoder recurses into children
+            if fp is None:
+                try:
+                    return encoder.encode(self)
+                except RecursionError:
+                    return ''.join(_iterencode_json(self, encoder))
+
+            for chunk in _iterencode_json(self, encoder):
+                fp.write(chunk)
+
+        def to_msgpack(self, fp: Any =None, **kwargs) -> Optional[bytes]:
+            '''
+            Dump Route into msgpack without converting it by to_base(), see
+            to_json. msgpack is required. kwargs are passed to
+            msgpack.Packer.
+            '''
+            import msgpack
+
+            packer = msgpack.Packer(**kwargs)
+            chunks = [packer.pack_map_header(len(self))]
+
+            # pack nested Mappings without recursion
+            stack = [iter(self._items())]
+
+            while stack:
+                for k, v in stack[-1]:
+                    chunks.append(packer.pack(k))
+
+                    if isinstance(v, Mapping):
+                        if any(isinstance(x, Mapping) for x in v.values() if type(x) not in _ATOMIC_TYPES):
+                            chunks.append(packer.pack_map_header(len(v)))
+                            stack.append(iter(v._items() if isinstance(v, Route) else v.items()))
+                            break
+
+                        # no nested Mappings, packed at once by the packer
+                        if not isinstance(v, _dict):
+                            v = _dict(v.items())
+
+                    chunks.append(packer.pack(v))
                 else:
-                    d[k] = v
+                    stack.pop()
+
+                # flush the packed chunks
+                if (fp is not None) and (len(chunks) > 1024):
+                    fp.write(b''.join(chunks))
+                    chunks.clear()
+
+            if fp is None:
+                return b''.join(chunks)
+
+            fp.write(b''.join(chunks))
+
+        def ingest(self, stream: Any, prefix: Hashable =None, include: Any =None,
+                   lines: bool =False, chunk_size: int =None) -> NoReturn:
+            '''
+            Parse JSON from a file object incrementally, and write the
+            leaves into this Route under prefix as they are parsed
+
+            Only one chunk of the stream and the leaf being parsed are
+            held in memory. Objects are walked into nodes, and arrays are
+            leaves. include keeps only the leaves matching any of the
+            given path prefixes or glob patterns, matched segment by
+            segment (e.g. 'AAA.*.CCC'), or a callable taking the path
+            tuple of a leaf. The subtrees which can not match are skipped
+            without building their leaves. If lines is True, the stream
+            is JSON lines, the n-th document is written under prefix + (n,).
+            '''
+            prefix = () if prefix is None else self.compilekey(prefix)
+            select = _ingest_selector(include, self.compilekey)
+            reader = _JSONReader(stream, chunk_size or _INGEST_CHUNK_SIZE)
+
+            def _leaves():
+                n = 0
+
+                while reader.peek():
+                    root = prefix + (n,) if lines else prefix
+
+                    for path, item in _iter_json_leaves(reader, self.compilekey, select):
+                        if not (root + path):
+                            raise TypeError('Expecting an object at the top level, got \'{}\''.format(
+                                                type(item).__name__))
+
+                        yield root + path, item
 
-            return d
+                    if not lines:
+                        reader.end()
+                        break
+
+                    n += 1
+
+            self._set_many(_leaves())
+
+        def archive(self, filename: str, compress: bool =False) -> NoReturn:
+            '''
+            Archive all leaves into a single binary file
+
+            The keys along the paths must be str or int, the empty nodes
+            are kept. If compress is True, the leaves are compressed with
+            zlib when it pays off. See RouteArchive for the file format.
+            '''
+            _write_archive(filename, _archive_leaves(self), compress)
+
+        @classmethod
+        def restore(cls, filename: str) -> __qualname__:
+            '''
+            Restore Route from the file written by archive(). To read only
+            a few leaves, use open_archive() instead.
+            '''
+            with RouteArchive(filename, cls) as archive:
+                return archive.to_route()
+
+    class FrozenRoute(Route):
+        '''
+        Immutable, hashable Route, created by Route.freeze()
+
+        The hash, plain() and to_base() are computed once on first use
+        and cached. The cached results are shared and must not be
+        modified. Leaves are not frozen, so hashing raises TypeError if
+        any of them is unhashable, e.g. a list.
+        '''
+
+        _frozen = True
+        _hash = None
+        _plain = None
+        _base = None
+
+        @classmethod
+        def _make(cls, items: Iterable) -> 'FrozenRoute':
+            node = cls.__new__(cls)
+            # bypass the overridden __setitem__
+            for k, v in items:
+                _base_dict.__setitem__(node, k, v)
+            return node
+
+        def __init__(self, *args, **kwargs) -> NoReturn:
+
+            if args or kwargs:
+                for k, v in _base_dict.items(Route(*args, **kwargs).freeze()):
+                    _base_dict.__setitem__(self, k, v)
+
+        def _immutable(self, *args, **kwargs) -> NoReturn:
+            raise TypeError('\'{}\' object is immutable'.format(type(self).__name__))
+
+        __setitem__ = _immutable
+        __delitem__ = _immutable
+        __ior__ = _immutable
+        update = _immutable
+        set_many = _immutable
+        delete_many = _immutable
+        ingest = _immutable
+        pop = _immutable
+        popitem = _immutable
+        clear = _immutable
+        setdefault = _immutable
+        move_to_end = _immutable
+
+        def __hash__(self) -> int:
+
+            if self._hash is None:
+                # hash children first, without recursion
+                nodes = [self]
+                for node in nodes:
+                    nodes.extend(v for v in _base_dict.values(node)
+                                 if isinstance(v, FrozenRoute) and (v._hash is None))
+
+                for node in reversed(nodes):
+                    try:
+                        node._hash = hash(frozenset(_base_dict.items(node)))
+                    except TypeError:
+                        node._unhashable()
+                        raise
+
+            return self._hash
+
+        def _unhashable(self) -> NoReturn:
+            '''
+            Raise TypeError naming the first unhashable leaf of this node
+            '''
+            for k, v in _base_dict.items(self):
+                try:
+                    hash(v)
+                except TypeError:
+                    raise TypeError('\'{}\' is hashable only if its leaves are, the leaf {!r} '
+                                    'is of unhashable type \'{}\''.format(
+                                        type(self).__name__, k, type(v).__name__)) from None
+
+        def __copy__(self) -> 'FrozenRoute':
+            return self
+
+        def __reduce__(self) -> tuple:
+            # pickle rebuilds dict subclasses through __setitem__
+            return (type(self)._make, (list(_base_dict.items(self)),))
+
+        @classmethod
+        def restore(cls, filename: str) -> 'FrozenRoute':
+
+            return Route.restore(filename).freeze()
+
+        @classmethod
+        def from_json(cls, s: Any, **kwargs) -> 'FrozenRoute':
+
+            return Route.from_json(s, **kwargs).freeze()
+
+        @classmethod
+        def from_msgpack(cls, data: Any, **kwargs) -> 'FrozenRoute':
+
+            return Route.from_msgpack(data, **kwargs).freeze()
+
+        def snapshot(self) -> 'FrozenRoute':
+            return self
+
+        def freeze(self) -> 'FrozenRoute':
+            return self
+
+        def plain(self, sep: str =None) -> _base_dict:
+
+            sep = sep or self._sep
+
+            if self._plain is None:
+                self._plain = {}
+
+            if sep not in self._plain:
+                self._plain[sep] = super(FrozenRoute, self).plain(sep=sep)
+
+            return self._plain[sep]
 
         def to_base(self) -> _base_dict:
 
-            return _base_dict((k, v.to_base()) if isinstance(v, type(self)) else (k, v) for k, v in self.items())
+            if self._base is None:
+                self._base = super(FrozenRoute, self).to_base()
+
+            return self._base
 
     # --- class def end
 
+    if frozen_type is not None:
+        FrozenRoute = frozen_type
+
+    Route.FrozenRoute = FrozenRoute
+
     Route.__copy__.__annotations__['return'] = Route
     Route.__copy__.__annotations__['return'] = Route
+    Route.snapshot.__annotations__['return'] = Route
 
 
     _ROUTE_LIST.append(Route)
@@ -275,9 +1338,1448 @@ def _Route(_base_dict: Type[_BASE_DICT] =_BASE_DICT,
     return Route
 
 
+def _FlatRoute(_base_dict: Type[_BASE_DICT] =_BASE_DICT) -> 'FlatRoute':
+    '''
+    Create FlatRoute class
+
+    FlatRoute stores all leaves in one flat hash map keyed by full path
+    tuples, and keeps a prefix index of the interior nodes. Reading a
+    leaf is a single hash lookup regardless of its depth, while interior
+    nodes are returned as live subtree views sharing the same storage.
+    '''
+    global _ROUTE_LIST
+
+    # --- class def start
+
+    class FlatRoute(MutableMapping):
+
+        # === Attributes ===
+
+        _sep = '.'
+        _auto_convert_dict = True
+        _lazy_convert_dict = False
+
+        # === Main interfaces ===
+
+        @classmethod
+        def set_sep(cls, sep: str =_DEFAULT_SEP) -> NoReturn:
+            cls._sep = sep or cls._sep
+            # drop compiled paths
+            _compile_path.cache_clear()
+
+        @classmethod
+        def enable_auto_convert(cls) -> NoReturn:
+            cls._auto_convert_dict = True
+
+        @classmethod
+        def disable_auto_convert(cls) -> NoReturn:
+            cls._auto_convert_dict = False
+
+        # Mappings are always flattened on assignment, lazy convertion is
+        # accepted for interface compatibility only.
+        @classmethod
+        def enable_lazy_convert(cls) -> NoReturn:
+            cls._lazy_convert_dict = True
+
+        @classmethod
+        def disable_lazy_convert(cls) -> NoReturn:
+            cls._lazy_convert_dict = False
+
+        @classmethod
+        def compilekey(cls, keys: Hashable, sep: str =None) -> Tuple[Hashable, ...]:
+            '''
+            Compile keys into a tuple of path segments
+            '''
+            # only str can be splitted
+            if isinstance(keys, str):
+                return _compile_path(keys, sep or cls._sep)
+
+            if isinstance(keys, tuple):
+                path = keys
+            elif isinstance(keys, list):
+                path = tuple(keys)
+            else:
+                return (keys,)
+
+            if not path:
+                raise KeyError(keys)
+
+            return path
+
+        # === Storage ===
+
+        def __init__(self, *args, **kwargs) -> NoReturn:
+
+            # full path -> leaf
+            self._leaves = {}
+            # interior node path -> {child key: None}, ordered as inserted
+            self._index = {(): {}}
+            self._prefix = ()
+
+            self.update(*args, **kwargs)
+
+        def _view(self, prefix: Tuple[Hashable, ...]) -> 'FlatRoute':
+            '''
+            Create a subtree view sharing the same storage
+            '''
+            view = type(self).__new__(type(self))
+            view._leaves = self._leaves
+            view._index = self._index
+            view._prefix = prefix
+            return view
+
+        def _node(self, path: Tuple[Hashable, ...]) -> Any:
+            '''
+            Retrieve the leaf or the subtree view at path, return
+            _MISSING if it does not exist
+            '''
+            item = self._leaves.get(path, _MISSING)
+
+            if (item is _MISSING) and (path in self._index):
+                item = self._view(path)
+
+            return item
+
+        def _attach(self, path: Tuple[Hashable, ...]) -> NoReturn:
+            '''
+            Register path to the index of its ancestors
+            '''
+            depth = len(path)
+
+            # the root is always indexed
+            if not depth:
+                return
+
+            # find the nearest indexed ancestor before mutating anything
+            while path[:depth-1] not in self._index:
+                parent = path[:depth-1]
+
+                # a leaf is in the way, overwrite if self._auto_convert_dict == True
+                if (parent in self._leaves) and (not self._auto_convert_dict):
+                    raise TypeError('\'{}\' object for key \'{}\' does not support item assignment'.format(
+                                    type(self._leaves[parent]).__name__, parent[-1]))
+                depth -= 1
+
+            self._index[path[:depth-1]][path[depth-1]] = None
+
+            for depth in range(depth, len(path)):
+                parent = path[:depth]
+                self._leaves.pop(parent, None)
+                self._index[parent] = {path[depth]: None}
+
+        def _drop(self, path: Tuple[Hashable, ...], detach: bool =True) -> NoReturn:
+            '''
+            Remove the leaf or the subtree at path. The entry of the root
+            is emptied but never removed.
+            '''
+            if path in self._leaves:
+                del self._leaves[path]
+            else:
+                stack = [path]
+                while stack:
+                    prefix = stack.pop()
+                    for key in self._index.pop(prefix):
+                        child = prefix + (key,)
+                        if child in self._index:
+                            stack.append(child)
+                        else:
+                            del self._leaves[child]
+
+            if not path:
+                self._index[()] = {}
+            elif detach:
+                del self._index[path[:-1]][path[-1]]
+
+        def _set(self, path: Tuple[Hashable, ...], item: Any) -> NoReturn:
+            '''
+            Set the leaf or flatten the Mapping at path
+            '''
+            stack = [(path, item)]
+
+            while stack:
+                path, item = stack.pop()
+
+                # replace the existing leaf or subtree, keep its position
+                if (path in self._leaves) or (path in self._index):
+                    self._drop(path, detach=False)
+
+                self._attach(path)
+
+                if self._auto_convert_dict and isinstance(item, Mapping):
+                    self._index[path] = {}
+                    # keys of FlatRoute are already splitted
+                    if isinstance(item, FlatRoute):
+                        items = [(path + (k,), v) for k, v in item.items()]
+                    else:
+                        items = [(path + self.compilekey(k), v) for k, v in item.items()]
+                    # pushed in reversed order to keep the insertion order
+                    stack.extend(reversed(items))
+                else:
+                    self._leaves[path] = item
+
+        # === Override MutableMapping ===
+
+        def __getitem__(self, keys: Hashable) -> Any:
+
+            item = self._node(self._prefix + self.compilekey(keys))
+
+            if item is _MISSING:
+                raise KeyError(keys)
+
+            return item
+
+        def __setitem__(self, keys: Hashable, item: Any) -> NoReturn:
+
+            self._set(self._prefix + self.compilekey(keys), item)
+
+        def __delitem__(self, keys: Hashable) -> NoReturn:
+
+            path = self._prefix + self.compilekey(keys)
+
+            if (path not in self._leaves) and (path not in self._index):
+                raise KeyError(keys)
+
+            self._drop(path)
+
+        def __contains__(self, keys: Hashable) -> bool:
+
+            # the empty path never exists
+            if isinstance(keys, (tuple, list)) and (not keys):
+                return False
+
+            path = self._prefix + self.compilekey(keys)
+
+            return (path in self._leaves) or (path in self._index)
+
+        def __iter__(self):
+
+            return iter(self._index.get(self._prefix, ()))
+
+        def __len__(self) -> int:
+
+            return len(self._index.get(self._prefix, ()))
+
+        def get(self, keys: Hashable, default: Any =None) -> Any:
+
+            if isinstance(keys, (tuple, list)) and (not keys):
+                return default
+
+            item = self._node(self._prefix + self.compilekey(keys))
+
+            return default if item is _MISSING else item
+
+        def pop(self, keys: Hashable, default: Any =None) -> Any:
+
+            if isinstance(keys, (tuple, list)) and (not keys):
+                return default
+
+            path = self._prefix + self.compilekey(keys)
+            item = self._node(path)
+
+            if item is _MISSING:
+                return default
+
+            # build the subtree from its leaves before dropping them
+            if isinstance(item, FlatRoute):
+                item = item._extract()
+
+            self._drop(path)
+            return item
+
+        def setdefault(self, keys: Hashable, default: Any =None) -> Any:
+
+            path = self._prefix + self.compilekey(keys)
+            item = self._node(path)
+
+            if item is _MISSING:
+                self._set(path, default)
+                item = self._node(path)
+
+            return item
+
+        def keys(self):
+
+            return list(self)
+
+        def items(self):
+
+            prefix = self._prefix
+            return [(k, self._node(prefix + (k,))) for k in self]
+
+        def values(self):
+
+            prefix = self._prefix
+            return [self._node(prefix + (k,)) for k in self]
+
+        def clear(self) -> NoReturn:
+
+            for k in list(self):
+                self._drop(self._prefix + (k,))
+
+        def __repr__(self) -> str:
+
+            return repr(self.to_base())
+
+        def __copy__(self) -> 'FlatRoute':
+
+            return self._extract()
+
+        def __deepcopy__(self, memo) -> 'FlatRoute':
+
+            return self._extract(lambda item: copy.deepcopy(item, memo))
+
+        def _extract(self, copy_leaf: Any =None) -> 'FlatRoute':
+            '''
+            Create a FlatRoute with its own storage from the leaves and
+            the interior nodes under this view
+            '''
+            ndict = type(self).__new__(type(self))
+            ndict._prefix = ()
+            ndict._leaves = {}
+            ndict._index = {}
+
+            for path, item in self.iter_leaves():
+                ndict._leaves[path] = item if copy_leaf is None else copy_leaf(item)
+            # interior nodes, including empty ones
+            for path, children in self._iter_index():
+                ndict._index[path[len(self._prefix):]] = children.copy()
+
+            return ndict
+
+        # === custom function ===
+
+        def _iter_index(self):
+            '''
+            Iterate over (path, children) of the interior nodes under this view
+            '''
+            stack = [self._prefix]
+
+            while stack:
+                prefix = stack.pop()
+                children = self._index.get(prefix, {})
+                yield prefix, children
+                for k in reversed(list(children)):
+                    if prefix + (k,) in self._index:
+                        stack.append(prefix + (k,))
+
+        def iter_leaves(self, sep: str =None) -> Iterator[Tuple[Hashable, Any]]:
+            '''
+            Iterate over (path, item) of the leaves under this view in
+            depth-first order, the same order as keys()
+
+            Paths are tuples of keys relative to this view, or strings
+            joined by sep if sep is given, the same as Route.iter_leaves.
+            '''
+            offset = len(self._prefix)
+            index = self._index
+            stack = [(self._prefix, iter(index.get(self._prefix, ())))]
+
+            while stack:
+                prefix, itr = stack[-1]
+
+                for k in itr:
+                    path = prefix + (k,)
+
+                    if path in index:
+                        stack.append((path, iter(index[path])))
+                        break
+
+                    if sep is None:
+                        yield path[offset:], self._leaves[path]
+                    elif len(path) - offset > 1:
+                        yield sep.join(map(str, path[offset:])), self._leaves[path]
+                    else:
+                        yield k, self._leaves[path]
+                else:
+                    stack.pop()
+
+        def plain(self, sep: str =None) -> _base_dict:
+
+            return _base_dict(self.iter_leaves(sep=sep or self._sep))
+
+        def to_base(self) -> _base_dict:
+
+            nodes = {self._prefix: _base_dict()}
+
+            for prefix, children in self._iter_index():
+                node = nodes[prefix]
+                for k in children:
+                    path = prefix + (k,)
+                    if path in self._leaves:
+                        node[k] = self._leaves[path]
+                    else:
+                        node[k] = nodes[path] = _base_dict()
+
+            return nodes[self._prefix]
+
+    # --- class def end
+
+    _ROUTE_LIST.append(FlatRoute)
+
+    return FlatRoute
+
+
+def _ConcurrentRoute(_base_dict: Type[_BASE_DICT] =_BASE_DICT,
+                     stripes: int =_LOCK_STRIPES,
+                     frozen_type: type =None) -> 'ConcurrentRoute':
+    '''
+    Create ConcurrentRoute class
+
+    ConcurrentRoute can be shared and mutated by multiple threads. Each
+    node is guarded by one of a fixed number of locks (stripes) picked by
+    its identity, so that writers of different nodes rarely wait for each
+    other. Reads take no lock. frozen_type is passed to _Route.
+    '''
+    Route = _Route(_base_dict, frozen_type=frozen_type)
+
+    # --- class def start
+
+    class ConcurrentRoute(Route):
+        '''
+        Thread-safe Route
+
+        Missing nodes are created, and items are set, popped or deleted
+        under the lock of their parent node, so that concurrent writers
+        never lose the nodes created by each other. setdefault() and pop()
+        are atomic, update(), set_many() and delete_many() are applied as
+        a whole while holding the locks of the nodes they write to. Reads
+        take no lock, and items(), keys() and values() return lists, which
+        can be iterated while the node is being mutated.
+
+        Batches are atomic only with respect to other writers. A reader
+        may see a batch partially applied, e.g. the first leaf of a
+        set_many() updated and the second not yet.
+        '''
+
+        _locks = [threading.RLock() for _ in range(stripes)]
+        # depth of the nodes being built by each thread
+        _local = threading.local()
+
+        # === Locking ===
+
+        @classmethod
+        def _stripe(cls, node: Any) -> Any:
+            '''
+            Lock of node. New nodes are not locked while being built,
+            since they are not shared with other threads yet.
+            '''
+            if getattr(cls._local, 'building', 0):
+                return _NO_LOCK
+
+            return cls._locks[cls._stripe_index(node)]
+
+        @classmethod
+        def _stripe_index(cls, node: Any) -> int:
+
+            return (id(node) >> 4) % len(cls._locks)
+
+        @classmethod
+        def _lock_all(cls) -> contextlib.ExitStack:
+            '''
+            Acquire all locks in order
+            '''
+            stack = contextlib.ExitStack()
+
+            if not getattr(cls._local, 'building', 0):
+                for lock in cls._locks:
+                    stack.enter_context(lock)
+
+            return stack
+
+        def _lock_parents(self, paths: list, create: bool =False) -> Tuple[contextlib.ExitStack, Optional[dict]]:
+            '''
+            Resolve the parent nodes of paths, and acquire their locks in
+            order. Return the locks and the resolved nodes, which are
+            passed as the cache of _set_many() or _delete_many(), so that
+            no other lock is acquired while applying the batch.
+
+            All locks are acquired instead, and the cache is None, if the
+            parents can not be resolved ahead, i.e. a parent is not a
+            Route or is shared with other Routes, or a node along the
+            paths is replaced by the batch itself.
+            '''
+            if getattr(self._local, 'building', 0):
+                return contextlib.ExitStack(), None
+
+            while True:
+                cache = {(): self}
+                parents = {}
+                written = set()
+
+                for path in paths:
+                    if any(path[:depth] in written for depth in range(1, len(path))):
+                        return self._lock_all(), None
+
+                    written.add(path)
+                    parent = self._resolve_prefix(path[:-1], cache, create=create)
+
+                    if parent is _MISSING:
+                        continue
+
+                    if (not isinstance(parent, Route)) or (parent._cow_token is not self._cow_token):
+                        return self._lock_all(), None
+
+                    parents[id(parent)] = parent
+
+                stack = contextlib.ExitStack()
+
+                for index in sorted({self._stripe_index(node) for node in parents.values()}):
+                    stack.enter_context(self._locks[index])
+
+                # the nodes may have been replaced before being locked
+                if all(_base_dict.get(cache[prefix[:-1]], prefix[-1], _MISSING) is node
+                            for prefix, node in cache.items() if prefix):
+                    return stack, cache
+
+                stack.close()
+
+        @classmethod
+        @contextlib.contextmanager
+        def _building(cls) -> Iterator[None]:
+
+            cls._local.building = getattr(cls._local, 'building', 0) + 1
+            try:
+                yield
+            finally:
+                cls._local.building -= 1
+
+        # === Path resolving ===
+
+        @staticmethod
+        def _descend(node: 'ConcurrentRoute', key: Hashable) -> Any:
+
+            child = _base_dict.get(node, key, _MISSING)
+
+            # existing nodes are reached without locking
+            if isinstance(child, type(node)) and (child._cow_token is node._cow_token):
+                return child
+
+            with node._stripe(node):
+                return Route._descend(node, key)
+
+        @staticmethod
+        def _own(node: 'ConcurrentRoute', key: Hashable, child: Any) -> Any:
+
+            if (not isinstance(child, Route)) or (child._cow_token is node._cow_token):
+                return child
+
+            with node._stripe(node):
+                # it may have been cloned by another thread
+                return Route._own(node, key, _base_dict.get(node, key, child))
+
+        @staticmethod
+        def _unfold(node: 'ConcurrentRoute', key: Hashable, item: Any) -> Any:
+
+            if not Route._pending(node, item):
+                return item
+
+            with node._stripe(node):
+                # it may have been converted by another thread
+                return Route._unfold(node, key, _base_dict.get(node, key, item))
+
+        @staticmethod
+        def _assign(parent: Any, key: Hashable, item: Any, pending: list =None) -> Any:
+
+            # the nodes filled from pending are built by _convert, not shared yet
+            if pending is not None:
+                return Route._assign(parent, key, item, pending)
+
+            with ConcurrentRoute._stripe(parent):
+                return Route._assign(parent, key, item, pending)
+
+        @classmethod
+        def _convert(cls, item: Mapping) -> 'ConcurrentRoute':
+
+            with cls._building():
+                return super(ConcurrentRoute, cls)._convert(item)
+
+        # === Override dict ===
+
+        def __init__(self, *args, **kwargs) -> NoReturn:
+
+            with self._building():
+                super(ConcurrentRoute, self).__init__(*args, **kwargs)
+
+        def __delitem__(self, keys: Hashable) -> NoReturn:
+
+            parent, key = self._resolve(keys, own=True)
+
+            with self._stripe(parent):
+                self._delete(parent, key, keys)
+
+        def pop(self, keys: Hashable, default: Any =None) -> Any:
+
+            parent, key = self._resolve(keys, own=True)
+
+            with self._stripe(parent):
+                return self._pop(parent, key, default)
+
+        def setdefault(self, keys: Hashable, default: Any =None) -> Any:
+
+            parent, key = self._resolve_or_create(keys)
+
+            with self._stripe(parent):
+                item = self._setdefault(parent, key, default)
+
+            return self._expose(keys, item)
+
+        def set_many(self, items: Iterable) -> NoReturn:
+
+            items = list(items.items() if isinstance(items, Mapping) else items)
+            locks, cache = self._lock_parents([self.compilekey(keys) for keys, _ in items],
+                                              create=True)
+
+            with locks:
+                self._set_many(items, cache=cache)
+
+        def delete_many(self, keys: Iterable) -> NoReturn:
+
+            keys = list(keys)
+            locks, cache = self._lock_parents([self.compilekey(key) for key in keys])
+
+            with locks:
+                self._delete_many(keys, cache)
+
+        def __iter__(self) -> Iterator[Hashable]:
+
+            return iter(self.keys())
+
+        def keys(self) -> list:
+
+            return list(_base_dict.keys(self))
+
+        def _items(self) -> list:
+
+            return list(super(ConcurrentRoute, self)._items())
+
+        def items(self) -> list:
+
+            return list(super(ConcurrentRoute, self).items())
+
+        def values(self) -> list:
+
+            return list(super(ConcurrentRoute, self).values())
+
+    # --- class def end
+
+    return ConcurrentRoute
+
+
+# === json ===
+
+def _encode_json_key(key: Any, encoder: json.JSONEncoder) -> Optional[str]:
+    '''
+    Encode the key of an object like json.JSONEncoder, return None if
+    the key is skipped
+    '''
+    if isinstance(key, str):
+        return encoder.encode(key)
+    elif (key is None) or isinstance(key, (bool, int, float)):
+        return '"{}"'.format(encoder.encode(key))
+    elif encoder.skipkeys:
+        return None
+
+    raise TypeError('keys must be str, int, float, bool or None, not {}'.format(
+                        type(key).__name__))
+
+def _iterencode_json(route: Mapping, encoder: json.JSONEncoder) -> Iterator[str]:
+    '''
+    Encode nested Mappings into JSON chunks without recursion, the same
+    output as encoder.iterencode(route). The nodes without nested
+    Mappings are encoded at once by the encoder.
+    '''
+    indent = encoder.indent
+    if (indent is not None) and (not isinstance(indent, str)):
+        indent = ' ' * indent
+
+    def _leaves_only(node: Mapping) -> bool:
+        return not any(isinstance(v, Mapping) for v in node.values() if type(v) not in _ATOMIC_TYPES)
+
+    def _encode_node(node: Mapping, depth: int) -> str:
+        chunk = encoder.encode(node if type(node) is _dict else _dict(node.items()))
+
+        # indent the encoded node to its depth
+        if indent and depth:
+            chunk = chunk.replace('\n', '\n' + indent * depth)
+
+        return chunk
+
+    if _leaves_only(route):
+        yield _encode_node(route, 0)
+        return
+
+    def _items(node: Mapping) -> Iterator[Tuple[Any, Any]]:
+        items = node.items()
+        return iter(sorted(items) if encoder.sort_keys else items)
+
+    # (node, items, first) of the objects being encoded
+    stack = [(route, _items(route))]
+    active = {id(route)}
+    first = True
+
+    yield '{'
+
+    while stack:
+        node, items = stack[-1]
+        newline = '' if indent is None else '\n' + indent * len(stack)
+
+        for k, v in items:
+            key = _encode_json_key(k, encoder)
+
+            if key is None:
+                continue
+
+            yield (newline if first else encoder.item_separator + newline) + key + encoder.key_separator
+            first = False
+
+            if isinstance(v, Mapping) and (not _leaves_only(v)):
+                if encoder.check_circular:
+                    if id(v) in active:
+                        raise ValueError('Circular reference detected')
+                    active.add(id(v))
+
+                stack.append((v, _items(v)))
+                first = True
+                yield '{'
+                break
+
+            if isinstance(v, Mapping):
+                yield _encode_node(v, len(stack))
+            else:
+                chunk = encoder.encode(v)
+                yield chunk.replace('\n', newline) if indent else chunk
+        else:
+            stack.pop()
+            active.discard(id(node))
+
+            if (indent is not None) and (not first):
+                yield '\n' + indent * len(stack)
+
+            first = False
+            yield '}'
+
+
+# === ingest ===
+
+_INGEST_CHUNK_SIZE = 1024 * 1024
+# decoding errors this close to the end of the buffer may be caused by a
+# token truncated by the chunk boundary
+_INGEST_LOOKAHEAD = 8
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER_START = frozenset('-0123456789')
+# optional ',', a key without escapes and ':', followed by the value
+_JSON_MEMBER = re.compile(r'[ \t\n\r]*(,)?[ \t\n\r]*"([^"\\\x00-\x1f]*)"[ \t\n\r]*:[ \t\n\r]*')
+
+class _JSONReader(object):
+    '''
+    Incremental reader of a JSON stream. The buffer holds the unread part
+    of the last chunks, and is extended when a token is truncated.
+    '''
+
+    def __init__(self, stream: Any, chunk_size: int =_INGEST_CHUNK_SIZE) -> NoReturn:
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = None
+        self.raw_decode = json.JSONDecoder().raw_decode
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def read(self) -> bool:
+        '''
+        Append the next chunk to the buffer, return False at the end of
+        the stream. The chunk grows with the buffer, so that long tokens
+        are retried only a few times.
+        '''
+        if self.eof:
+            return False
+
+        data = self.stream.read(max(self.chunk_size, len(self.buf) - self.pos))
+
+        if isinstance(data, bytes):
+            if self.decoder is None:
+                self.decoder = codecs.getincrementaldecoder('utf-8')()
+            chunk = self.decoder.decode(data, final=not data)
+        else:
+            chunk = data
+
+        self.eof = not data
+
+        # the positions of the current token are kept if nothing is read
+        if chunk:
+            self.buf = self.buf[self.pos:] + chunk
+            self.pos = 0
+
+        return (not self.eof) or bool(chunk)
+
+    def peek(self) -> str:
+        '''
+        Skip whitespaces, return the next char or '' at the end of the stream
+        '''
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+
+            if not self.read():
+                return ''
+
+    def error(self, msg: str) -> json.JSONDecodeError:
+
+        return json.JSONDecodeError(msg, self.buf, self.pos)
+
+    def expect(self, char: str) -> NoReturn:
+
+        if self.peek() != char:
+            raise self.error('Expecting \'{}\' delimiter'.format(char))
+
+        self.pos += 1
+
+    def end(self) -> NoReturn:
+
+        if self.peek():
+            raise self.error('Extra data')
+
+    def _truncated(self, err: json.JSONDecodeError) -> bool:
+
+        return ((err.pos >= len(self.buf) - _INGEST_LOOKAHEAD) or
+                err.msg.startswith('Unterminated string'))
+
+    def string(self) -> str:
+
+        while True:
+            try:
+                item, end = json.decoder.scanstring(self.buf, self.pos + 1)
+            except json.JSONDecodeError as err:
+                if self._truncated(err) and self.read():
+                    continue
+                raise
+
+            self.pos = end
+            return item
+
+    def value(self) -> Any:
+        '''
+        Decode the value at the current position with the C scanner
+        '''
+        while True:
+            try:
+                item, end = self.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as err:
+                if self._truncated(err) and self.read():
+                    continue
+                raise
+
+            # the number may continue in the next chunk, e.g. '1.' of '1.5'
+            if ((end > len(self.buf) - _INGEST_LOOKAHEAD) and
+                    (self.buf[self.pos] in _NUMBER_START) and self.read()):
+                continue
+
+            self.pos = end
+            return item
+
+def _load_json_objects(reader: _JSONReader, object_pairs_hook: Any) -> Any:
+    '''
+    Decode the next JSON value in the reader without recursion, the
+    objects are built by object_pairs_hook from the innermost ones
+    '''
+    if reader.peek() != '{':
+        return reader.value()
+
+    reader.pos += 1
+
+    # pairs of the objects being decoded, and their keys in the parents
+    stack = [[]]
+    keys = []
+    first = True
+
+    while True:
+        char = reader.peek()
+
+        if char == '}':
+            reader.pos += 1
+            item = object_pairs_hook(stack.pop())
+
+            if not stack:
+                return item
+
+            stack[-1].append((keys.pop(), item))
+            first = False
+            continue
+
+        if not first:
+            reader.expect(',')
+            char = reader.peek()
+
+        if char != '"':
+            raise reader.error('Expecting property name enclosed in double quotes')
+
+        key = reader.string()
+        reader.expect(':')
+        first = False
+
+        if reader.peek() == '{':
+            reader.pos += 1
+            stack.append([])
+            keys.append(key)
+            first = True
+            continue
+
+        stack[-1].append((key, reader.value()))
+
+def _iter_json_leaves(reader: _JSONReader, compilekey: Any, select: Any) -> Iterator[Tuple[Tuple[Hashable, ...], Any]]:
+    '''
+    Iterate over (path, item) of the leaves of the next JSON value in the
+    reader, without recursion
+
+    Objects are walked without being built, their str keys are compiled
+    into paths. Empty objects are yielded as empty dicts. select(path,
+    node) returns True to keep the leaf or the whole node, False to skip
+    it, or None to walk into the node and select its members.
+    '''
+    if reader.peek() != '{':
+        item = reader.value()
+
+        if select(()):
+            yield (), item
+        return
+
+    reader.pos += 1
+
+    # (path, selected) of the objects being walked
+    stack = [((), select((), True))]
+    first = True
+
+    while stack:
+        path, selected = stack[-1]
+
+        # fast path, the delimiter and a key without escapes in one match
+        match = _JSON_MEMBER.match(reader.buf, reader.pos)
+
+        if (match is not None) and (match.end() < len(reader.buf)) and (first != bool(match.group(1))):
+            reader.pos = match.end()
+            key = match.group(2)
+
+        else:
+            char = reader.peek()
+
+            if char == '}':
+                reader.pos += 1
+                stack.pop()
+
+                if first and stack and (selected is True):
+                    yield path, _dict()
+
+                first = False
+                continue
+
+            if not first:
+                reader.expect(',')
+                char = reader.peek()
+
+            if char != '"':
+                raise reader.error('Expecting property name enclosed in double quotes')
+
+            key = reader.string()
+            reader.expect(':')
+
+        path = path + compilekey(key)
+        first = False
+
+        if reader.peek() == '{':
+            reader.pos += 1
+            stack.append((path, select(path, True) if selected is None else selected))
+            first = True
+            continue
+
+        item = reader.value()
+
+        if (selected is True) or ((selected is None) and select(path)):
+            yield path, item
+
+def _ingest_selector(include: Any, compilekey: Any) -> Any:
+    '''
+    Create select(path, node) of _iter_json_leaves from include
+    '''
+    if include is None:
+        return lambda path, node=False: True
+
+    if callable(include):
+        return lambda path, node=False: None if node else bool(include(path))
+
+    if isinstance(include, (str, tuple)):
+        include = [include]
+
+    patterns = [compilekey(pattern) for pattern in include]
+
+    def _select(path, node=False):
+        partial = False
+
+        for pattern in patterns:
+            if all(fnmatch.fnmatchcase(str(k), str(p)) for k, p in zip(path, pattern)):
+                # the leaf itself or any leaf under the subtree
+                if len(pattern) <= len(path):
+                    return True
+                partial = True
+
+        # the node may contain the matched leaves
+        return None if (partial and node) else False
+
+    return _select
+
+
+# === archive ===
+
+# file layout:
+#   header | data section | records | order table | path pool
+#
+# records are fixed-size and sorted by the encoded paths, so that a leaf
+# or a subtree can be located by binary search over the mapped file. The
+# order table maps the insertion order to the records, and the path pool
+# holds the encoded paths, which are the keys joined by '\0'. Each key is
+# prefixed by its type, and the empty nodes are recorded as entries of
+# their own.
+
+_ARCHIVE_MAGIC = b'ROUTEARC'
+_ARCHIVE_VERSION = 2
+# magic, version, reserved, count, records offset, order offset, pool offset
+_ARCHIVE_HEADER = struct.Struct('<8sHHIQQQQ')
+# data offset, data length, path offset, path length, codec, tag
+_ARCHIVE_RECORD = struct.Struct('<QQQIBB2x')
+_ARCHIVE_ORDER = struct.Struct('<I')
+# leaves smaller than this are never compressed
+_ARCHIVE_COMPRESS_MIN = 64
+
+_CODEC_RAW = 0
+_CODEC_ZLIB = 1
+
+_TAG_PICKLE = 0
+_TAG_NONE = 1
+_TAG_BOOL = 2
+_TAG_INT = 3
+_TAG_FLOAT = 4
+_TAG_STR = 5
+_TAG_BYTES = 6
+_TAG_NDARRAY = 7
+# empty node
+_TAG_NODE = 8
+
+_KEY_STR = b's'
+_KEY_INT = b'i'
+
+def _encode_key(key: Hashable) -> bytes:
+
+    if isinstance(key, str):
+        if '\0' in key:
+            raise TypeError('Keys containing \'\\0\' can not be archived, got {!r}'.format(key))
+        return _KEY_STR + key.encode('utf-8')
+    elif isinstance(key, int) and (not isinstance(key, bool)):
+        return _KEY_INT + str(int(key)).encode('ascii')
+
+    raise TypeError('Only str and int keys can be archived, got {!r} of type {}'.format(
+                        key, type(key).__name__))
+
+def _decode_key(data: bytes) -> Hashable:
+
+    if data[:1] == _KEY_INT:
+        return int(data[1:])
+
+    return data[1:].decode('utf-8')
+
+def _encode_path(path: Tuple[Hashable, ...]) -> bytes:
+
+    return b'\0'.join(_encode_key(key) for key in path)
+
+def _decode_path(data: bytes) -> Tuple[Hashable, ...]:
+
+    return tuple(_decode_key(key) for key in data.split(b'\0'))
+
+def _archive_leaves(route: 'Route') -> Iterator[Tuple[Tuple[Hashable, ...], Any]]:
+    '''
+    Iterate over (path, item) of the leaves in depth-first order, the
+    empty nodes are yielded as (path, _MISSING)
+    '''
+    node_type = type(route)
+    keys = []
+    stack = [iter(route._items())]
+
+    while stack:
+        for k, v in stack[-1]:
+            if isinstance(v, node_type):
+                if not v:
+                    yield tuple(keys) + (k,), _MISSING
+                    continue
+
+                keys.append(k)
+                stack.append(iter(v._items()))
+                break
+
+            yield tuple(keys) + (k,), v
+        else:
+            stack.pop()
+            if keys:
+                keys.pop()
+
+def _encode_leaf(item: Any) -> Tuple[int, bytes]:
+    '''
+    Encode leaf into (tag, data)
+    '''
+    t = type(item)
+
+    if item is None:
+        return _TAG_NONE, b''
+    elif t is bool:
+        return _TAG_BOOL, b'\x01' if item else b'\x00'
+    elif (t is int) and (-2**63 <= item < 2**63):
+        return _TAG_INT, struct.pack('<q', item)
+    elif t is float:
+        return _TAG_FLOAT, struct.pack('<d', item)
+    elif t is bytes:
+        return _TAG_BYTES, item
+    elif t is str:
+        try:
+            return _TAG_STR, item.encode('utf-8')
+        except UnicodeEncodeError:
+            pass
+
+    # numpy is only needed if the arrays exist
+    np = sys.modules.get('numpy', None)
+
+    if (np is not None) and (t is np.ndarray) and (not item.dtype.hasobject):
+        import io
+        fp = io.BytesIO()
+        np.save(fp, item, allow_pickle=False)
+        return _TAG_NDARRAY, fp.getvalue()
+
+    return _TAG_PICKLE, pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _decode_leaf(tag: int, data: bytes) -> Any:
+    '''
+    Decode leaf from (tag, data)
+    '''
+    if tag == _TAG_NONE:
+        return None
+    elif tag == _TAG_BOOL:
+        return data == b'\x01'
+    elif tag == _TAG_INT:
+        return struct.unpack('<q', data)[0]
+    elif tag == _TAG_FLOAT:
+        return struct.unpack('<d', data)[0]
+    elif tag == _TAG_BYTES:
+        return data
+    elif tag == _TAG_STR:
+        return data.decode('utf-8')
+    elif tag == _TAG_NDARRAY:
+        import io
+        import numpy as np
+        return np.load(io.BytesIO(data), allow_pickle=False)
+    elif tag == _TAG_PICKLE:
+        return pickle.loads(data)
+
+    raise ValueError('Unknown leaf tag: {}'.format(tag))
+
+def _write_archive(filename: str, leaves: Iterable, compress: bool =False) -> NoReturn:
+    '''
+    Write (path, item) of the leaves into the archive file
+
+    The archive is written to a temporary file in the same directory,
+    which replaces filename only when it is complete.
+    '''
+    tmpname = '{}.{}.tmp'.format(filename, os.getpid())
+
+    try:
+        with open(tmpname, 'wb') as fp:
+            _write_archive_to(fp, leaves, compress)
+
+        os.replace(tmpname, filename)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmpname)
+        raise
+
+def _write_archive_to(fp: Any, leaves: Iterable, compress: bool =False) -> NoReturn:
+    '''
+    Write (path, item) of the leaves into the file object
+    '''
+    entries = []
+
+    # header is written at last
+    fp.write(b'\0' * _ARCHIVE_HEADER.size)
+
+    # data section
+    for path, item in leaves:
+        if item is _MISSING:
+            tag, data = _TAG_NODE, b''
+        else:
+            tag, data = _encode_leaf(item)
+        codec = _CODEC_RAW
+
+        if compress and (len(data) >= _ARCHIVE_COMPRESS_MIN):
+            compressed = zlib.compress(data)
+            if len(compressed) < len(data):
+                data, codec = compressed, _CODEC_ZLIB
+
+        entries.append((_encode_path(path), fp.tell(), len(data), codec, tag))
+        fp.write(data)
+
+    # sort by paths, rank[i] is the record of the i-th leaf
+    order = sorted(range(len(entries)), key=lambda i: entries[i][0])
+    rank = [0] * len(entries)
+    for r, i in enumerate(order):
+        rank[i] = r
+
+    # records
+    records_offset = fp.tell()
+    path_offset = 0
+    for i in order:
+        path, offset, length, codec, tag = entries[i]
+        fp.write(_ARCHIVE_RECORD.pack(offset, length, path_offset, len(path), codec, tag))
+        path_offset += len(path)
+
+    # order table
+    order_offset = fp.tell()
+    fp.write(b''.join(_ARCHIVE_ORDER.pack(r) for r in rank))
+
+    # path pool
+    pool_offset = fp.tell()
+    for i in order:
+        fp.write(entries[i][0])
+
+    fp.seek(0)
+    fp.write(_ARCHIVE_HEADER.pack(_ARCHIVE_MAGIC, _ARCHIVE_VERSION, 0, 0, len(entries),
+                                  records_offset, order_offset, pool_offset))
+
+
+class RouteArchive(Mapping):
+    '''
+    Read-only Mapping over the file written by Route.archive()
+
+    The file is memory-mapped, opening it only reads the header. Leaves
+    are located by binary search over the sorted records and decoded on
+    access, interior nodes are returned as RouteArchive views sharing
+    the same file.
+    '''
+
+    def __init__(self, filename: str, route_type: type =None) -> NoReturn:
+
+        self._route_type = route_type or Route
+
+        # the header is validated before the file is mapped
+        with open(filename, 'rb') as fp:
+            header = fp.read(_ARCHIVE_HEADER.size)
+
+            if not header.startswith(_ARCHIVE_MAGIC):
+                raise ValueError('Not a Route archive: {}'.format(filename))
+
+            if len(header) < _ARCHIVE_HEADER.size:
+                raise ValueError('Truncated Route archive: {}'.format(filename))
+
+            (_, version, _, _, self._count, self._records,
+                self._order, self._pool) = _ARCHIVE_HEADER.unpack(header)
+
+            if version != _ARCHIVE_VERSION:
+                raise ValueError('Unsupported Route archive version: {}'.format(version))
+
+            # the tables are laid out back to back up to the path pool,
+            # and the path of the last record ends the file
+            size = os.fstat(fp.fileno()).st_size
+            end = self._pool
+            if (self._count > 0) and (_ARCHIVE_HEADER.size + _ARCHIVE_RECORD.size <= self._order <= size):
+                fp.seek(self._order - _ARCHIVE_RECORD.size)
+                _, _, offset, length, _, _ = _ARCHIVE_RECORD.unpack(fp.read(_ARCHIVE_RECORD.size))
+                end += offset + length
+
+            if not ((_ARCHIVE_HEADER.size <= self._records <= self._pool)
+                    and (self._order == self._records + self._count * _ARCHIVE_RECORD.size)
+                    and (self._pool == self._order + self._count * _ARCHIVE_ORDER.size)
+                    and (end == size)):
+                raise ValueError('Truncated Route archive: {}'.format(filename))
+
+            self._mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # encoded path of this view (None for the root), and the range
+        # of its records
+        self._prefix = None
+        self._lo = 0
+        self._hi = self._count
+
+    def _view(self, prefix: bytes, lo: int, hi: int) -> 'RouteArchive':
+        view = copy.copy(self)
+        view._prefix = prefix
+        view._lo = lo
+        view._hi = hi
+        return view
+
+    def _record(self, i: int) -> tuple:
+        return _ARCHIVE_RECORD.unpack_from(self._mm, self._records + i * _ARCHIVE_RECORD.size)
+
+    def _path(self, i: int) -> bytes:
+        _, _, offset, length, _, _ = self._record(i)
+        if self._pool + offset + length > len(self._mm):
+            raise ValueError('Truncated Route archive, the path of record {} is out of bounds'.format(i))
+        return self._mm[self._pool+offset:self._pool+offset+length]
+
+    def _bisect(self, path: bytes) -> int:
+        '''
+        Index of the first record whose path is not less than path
+        '''
+        lo, hi = self._lo, self._hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._path(mid) < path:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _leaf(self, i: int) -> Any:
+        offset, length, _, _, codec, tag = self._record(i)
+
+        if tag == _TAG_NODE:
+            return self._route_type()
+
+        # the data section ends at the records
+        if offset + length > self._records:
+            raise ValueError('Corrupted Route archive, the data of record {} is out of bounds'.format(i))
+
+        data = self._mm[offset:offset+length]
+
+        if codec == _CODEC_ZLIB:
+            data = zlib.decompress(data)
+
+        return _decode_leaf(tag, data)
+
+    def _node(self, keys: Hashable) -> Any:
+        '''
+        Retrieve the leaf or the view at keys, return _MISSING if it
+        does not exist
+        '''
+        try:
+            path = _encode_path(self._route_type.compilekey(keys))
+        except TypeError:
+            # keys that can not be archived do not exist
+            return _MISSING
+
+        if self._prefix is not None:
+            path = self._prefix + b'\0' + path
+
+        # leaf or empty node
+        i = self._bisect(path)
+        if (i < self._hi) and (self._path(i) == path):
+            _, _, _, _, _, tag = self._record(i)
+            if tag == _TAG_NODE:
+                return self._view(path, i+1, i+1)
+            return self._leaf(i)
+
+        # subtree, the paths under it are contiguous since '\0' is the smallest byte
+        lo = self._bisect(path + b'\0')
+        hi = self._bisect(path + b'\1')
+        if lo < hi:
+            return self._view(path, lo, hi)
+
+        return _MISSING
+
+    def __getitem__(self, keys: Hashable) -> Any:
+
+        item = self._node(keys)
+
+        if item is _MISSING:
+            raise KeyError(keys)
+
+        return item
+
+    def __contains__(self, keys: Hashable) -> bool:
+
+        return self._node(keys) is not _MISSING
+
+    def get(self, keys: Hashable, default: Any =None) -> Any:
+
+        item = self._node(keys)
+
+        return default if item is _MISSING else item
+
+    def __iter__(self) -> Iterator[Hashable]:
+
+        offset = 0 if self._prefix is None else len(self._prefix) + 1
+        last = None
+
+        # children in sorted order
+        for i in range(self._lo, self._hi):
+            key = self._path(i)[offset:].split(b'\0', 1)[0]
+            if key != last:
+                last = key
+                yield _decode_key(key)
+
+    def __len__(self) -> int:
+
+        return sum(1 for _ in self)
+
+    def iter_leaves(self, sep: str =None) -> Iterator[Tuple[Hashable, Any]]:
+        '''
+        Iterate over (path, item) of the leaves under this view
+
+        The leaves are in the archived order for the whole archive, and
+        in sorted order for views. The empty nodes are yielded as empty
+        Routes.
+        '''
+        if self._prefix is not None:
+            indices = range(self._lo, self._hi)
+        else:
+            indices = (r for (r,) in _ARCHIVE_ORDER.iter_unpack(
+                            self._mm[self._order:self._order+self._count*_ARCHIVE_ORDER.size]))
+
+        offset = 0 if self._prefix is None else len(self._prefix) + 1
+
+        for i in indices:
+            path = _decode_path(self._path(i)[offset:])
+            if sep is not None:
+                # the same as Route.iter_leaves
+                path = sep.join(map(str, path)) if len(path) > 1 else path[0]
+            yield path, self._leaf(i)
+
+    def to_route(self) -> 'Route':
+        '''
+        Load the leaves under this view into a Route
+        '''
+        route = self._route_type()
+        route.set_many(self.iter_leaves())
+        return route
+
+    def close(self) -> NoReturn:
+
+        self._mm.close()
+
+    def __enter__(self) -> 'RouteArchive':
+
+        return self
+
+    def __exit__(self, *args) -> NoReturn:
+
+        self.close()
+
+    def __repr__(self) -> str:
+
+        return '<RouteArchive: {} leaves>'.format(self._hi - self._lo)
+
+def open_archive(filename: str, route_type: type =None) -> RouteArchive:
+    '''
+    Open the file written by Route.archive() for random access
+    '''
+    return RouteArchive(filename, route_type)
+
+
 Route = _Route()
-OrderedRoute = _Route(OrderedDict)
+FrozenRoute = Route.FrozenRoute
+# freeze() of all Route classes returns the same FrozenRoute
+OrderedRoute = _Route(OrderedDict, frozen_type=FrozenRoute)
+FlatRoute = _FlatRoute()
+ConcurrentRoute = _ConcurrentRoute(frozen_type=FrozenRoute)
 
 # update qualname
 Route.__qualname__ = 'Route'
-OrderedRoute.__qualname__ = 'OrderedRoute'
\ No newline at end of file
+OrderedRoute.__qualname__ = 'OrderedRoute'
+FlatRoute.__qualname__ = 'FlatRoute'
+ConcurrentRoute.__qualname__ = 'ConcurrentRoute'
+FrozenRoute.__qualname__ = 'FrozenRoute'
\ No newline at end of file
@@ -0,0 +1,68 @@
+import time
+import threading
+from route_v2 import ConcurrentRoute
+
+
+THREADS = 8
+
+
+def run(threads, func):
+    workers = [threading.Thread(target=func, args=(i,)) for i in range(threads)]
+    start = time.time()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.time() - start
+
+
+# === contention ===
+
+# shared live config, one worker writes large batches into a section of
+# it while the others write small batches into their own sections
+keys = ['svc{}.opt{}.v{}'.format(i, j, k) for i in range(10) for j in range(10) for k in range(10)]
+doc = {key: 0 for key in keys}
+section = {'opt{}.v{}'.format(j, k): 1 for j in range(100) for k in range(100)}
+
+DURATION = 2.0
+
+
+class LockAllRoute(ConcurrentRoute):
+    # batches holding all locks
+    def set_many(self, items):
+        with self._lock_all():
+            super(ConcurrentRoute, self).set_many(items)
+
+
+def bench_batches(r):
+    latencies = [[] for _ in range(THREADS)]
+    reloads = [0]
+    stop = time.time() + DURATION
+
+    def work(i):
+        while time.time() < stop:
+            # the first worker writes a batch into svc0
+            if i == 0:
+                r.set_many(('svc0.' + key, 1) for key in section)
+                reloads[0] += 1
+                continue
+
+            # the others write small batches into their own section
+            start = time.perf_counter()
+            r.set_many([('svc{}.opt0.v0'.format(i), 1), ('svc{}.opt0.v1'.format(i), 1)])
+            latencies[i].append(time.perf_counter() - start)
+
+    run(THREADS, work)
+
+    latencies = sorted(sum(latencies, []))
+    return (reloads[0], len(latencies), latencies[int(len(latencies) * 0.99)] * 1e3,
+            latencies[-1] * 1e3)
+
+
+print('{} threads, one of them writing batches of {} leaves'.format(THREADS, len(section)))
+
+result = bench_batches(ConcurrentRoute(doc))
+print('* ConcurrentRoute:      {} batches, {} small batches, p99 latency {:.3f} ms, max {:.3f} ms'.format(*result))
+
+result = bench_batches(LockAllRoute(doc))
+print('* holding all locks:    {} batches, {} small batches, p99 latency {:.3f} ms, max {:.3f} ms'.format(*result))
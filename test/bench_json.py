@@ -0,0 +1,45 @@
+import io
+import json
+import timeit
+from route_v2 import Route
+
+
+def bench(name, func, reference, number=10, repeat=5):
+    t = min(timeit.repeat(func, number=number, repeat=repeat))
+    ref = min(timeit.repeat(reference, number=number, repeat=repeat))
+    print('* {:<12} direct: {:.3f} sec, via dict: {:.3f} sec ({:.2f}x)'.format(name, t, ref, ref/t))
+
+
+# shallow and wide: 100 x 10 x 10 leaves
+doc = {'g{}'.format(i): {'s{}'.format(j): {'k{}'.format(k): k for k in range(10)}
+                         for j in range(10)} for i in range(100)}
+
+s = json.dumps(doc)
+r = Route.from_json(s)
+
+assert r == Route(json.loads(s))
+assert type(r['g0']) is Route and type(r['g0.s0']) is Route
+assert json.loads(r.to_json()) == doc
+
+f = io.StringIO()
+r.to_json(f)
+assert json.loads(f.getvalue()) == doc
+
+print('=========================')
+print('json, {} leaves'.format(len(r.plain())))
+
+bench('from_json', lambda: Route.from_json(s), lambda: Route(json.loads(s)))
+bench('to_json', lambda: r.to_json(), lambda: json.dumps(r.to_base()))
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+if msgpack is not None:
+    data = msgpack.packb(doc)
+    assert Route.from_msgpack(data) == r
+    assert msgpack.unpackb(r.to_msgpack()) == doc
+
+    bench('from_msgpack', lambda: Route.from_msgpack(data), lambda: Route(msgpack.unpackb(data)))
+    bench('to_msgpack', lambda: r.to_msgpack(), lambda: msgpack.packb(r.to_base()))
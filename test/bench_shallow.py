@@ -0,0 +1,75 @@
+import re
+import sys
+import copy
+import types
+import timeit
+import subprocess
+from route_v2 import Route
+
+
+# usage: python bench_shallow.py [baseline revision]
+#
+# baseline: route_v2 loaded from git, by default at the root commit,
+# before any of the optimizations
+def root_commit():
+    revs = subprocess.check_output(['git', 'rev-list', '--max-parents=0', 'HEAD'],
+                                   universal_newlines=True).split()
+    return revs[-1]
+
+BASELINE = sys.argv[1] if len(sys.argv) > 1 else root_commit()
+
+def load_baseline(rev):
+    src = subprocess.check_output(['git', 'show', '{}:route_v2.py'.format(rev)],
+                                  universal_newlines=True)
+    # the ABCs were imported from collections, which fails since python 3.10
+    src = re.sub(r'from collections import (Iterable|Mapping|MutableMapping)\b',
+                 r'from collections.abc import \1', src)
+
+    module = types.ModuleType('route_v2_baseline')
+    exec(compile(src, 'route_v2@{}'.format(rev), 'exec'), module.__dict__)
+    return module
+
+Baseline = load_baseline(BASELINE).Route
+
+
+def bench(name, func, reference, number=10, repeat=7):
+    # alternate the runs, so that both suffer the same load
+    t, ref = float('inf'), float('inf')
+    for _ in range(repeat):
+        t = min(t, timeit.timeit(func, number=number))
+        ref = min(ref, timeit.timeit(reference, number=number))
+    print('* {:<12} current: {:.3f} sec, baseline: {:.3f} sec ({:.2f}x)'.format(name, t, ref, ref/t))
+
+def get_all(r):
+    for key in keys:
+        r[key]
+
+def set_all(r):
+    for key in keys:
+        r[key] = 1
+
+
+# shallow and wide: 100 x 10 x 10 leaves
+doc = {'g{}'.format(i): {'s{}'.format(j): {'k{}'.format(k): k for k in range(10)}
+                         for j in range(10)} for i in range(100)}
+
+r = Route(doc)
+b = Baseline(doc)
+
+keys = list(r.plain().keys())
+
+assert r.to_base() == b.to_base() == doc
+assert r.plain() == b.plain()
+assert copy.deepcopy(r).to_base() == copy.deepcopy(b).to_base()
+assert [r[key] for key in keys] == [b[key] for key in keys]
+
+print('=========================')
+print('shallow tree, {} leaves, baseline {}'.format(len(keys), BASELINE))
+
+bench('construct', lambda: Route(doc), lambda: Baseline(doc))
+bench('update', lambda: Route().update(doc), lambda: Baseline().update(doc))
+bench('to_base', lambda: r.to_base(), lambda: b.to_base())
+bench('plain', lambda: r.plain(), lambda: b.plain())
+bench('deepcopy', lambda: copy.deepcopy(r), lambda: copy.deepcopy(b))
+bench('__getitem__', lambda: get_all(r), lambda: get_all(b))
+bench('__setitem__', lambda: set_all(r), lambda: set_all(b))
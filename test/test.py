@@ -144,3 +144,62 @@ print('\nThe structure of `a`: ')
 print('    {}'.format(a))
 
 print('test/bytes: {}'.format(a['test/bytes'].decode('utf-8')))
+
+
+print('\nRestore `my_test.zip` lazily and save to `b`')
+b = Route.restore('my_test.zip', lazy=True)
+
+assert sorted(b.keys()) == sorted(a.keys())
+assert (b['model/val'] == val2).all()
+assert (b['model/policy/val'] == val).all()
+assert b['test/bytes'].decode('utf-8') == '大家好'
+
+# the placeholders are loaded by the dict methods
+e = Route()
+e['x/y'] = b'1'
+e['x/z'] = b'2'
+e['w'] = b'3'
+e.archive('my_lazy_test.zip')
+
+assert Route.restore('my_lazy_test.zip', lazy=True) == Route.restore('my_lazy_test.zip')
+assert not (Route.restore('my_lazy_test.zip', lazy=True) != e)
+
+b = Route.restore('my_lazy_test.zip', lazy=True)
+assert b['x'].setdefault('y') == b'1'
+assert b['x'].popitem() == ('z', b'2')
+assert b.copy()['w'] == b'3'
+assert dict(b.items())['w'] == b'3'
+
+print('lazy restore OK')
+
+# the patterns are matched segment by segment
+e['a/b/c'] = b'4'
+e['a/c'] = b'5'
+e.archive('my_lazy_test.zip')
+
+assert dict(Route.restore('my_lazy_test.zip', include='*/c').plain()) == {'a/c': b'5'}
+assert Route.restore('my_lazy_test.zip', include='x*z') == {}
+assert dict(Route.restore('my_lazy_test.zip', include='*/b').plain()) == {'a/b/c': b'4'}
+assert dict(Route.restore('my_lazy_test.zip', include='a', exclude='a/*/c').plain()) == {'a/c': b'5'}
+
+print('include/exclude OK')
+
+# the archives are the same with or without workers
+import zipfile
+import hashlib
+
+def digest(filename):
+    with open(filename, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+for kwargs in [{}, {'compression': zipfile.ZIP_DEFLATED}, {'compression': zipfile.ZIP_BZIP2}]:
+    e.archive('my_lazy_test.zip', **kwargs)
+    expected = digest('my_lazy_test.zip')
+
+    for workers in [1, 4]:
+        e.archive('my_lazy_test.zip', workers=workers, **kwargs)
+        assert digest('my_lazy_test.zip') == expected
+
+    assert Route.restore('my_lazy_test.zip') == e
+
+print('reproducible archive OK')
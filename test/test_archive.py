@@ -0,0 +1,121 @@
+import os
+import route_v2
+from route_v2 import Route
+
+
+filename = 'my_route.arc'
+
+d = Route({'AAA.BBB': 10, 'AAA.CCC': 'foo', 'AAA.DDD.EEE': [1, 2, 3]})
+d['AAA'][''] = 'empty'
+d[['', 'x']] = 1
+
+d.archive(filename, compress=True)
+
+# === empty keys ===
+
+with route_v2.open_archive(filename) as arc:
+    assert sorted(arc) == ['', 'AAA']
+    assert sorted(arc['AAA']) == ['', 'BBB', 'CCC', 'DDD']
+    assert arc['AAA'][''] == 'empty'
+    assert arc['AAA.CCC'] == 'foo'
+
+    # a view of the key '' is not the root
+    assert list(arc['']) == ['x'] and arc[''][['x']] == 1
+    assert dict(arc[''].iter_leaves()) == {('x',): 1}
+    assert 'AAA' not in arc['']
+
+    assert Route.restore(filename) == d
+
+print('=========================')
+print('empty keys OK')
+
+# === failed archive ===
+
+e = Route({'AAA': 1, 'BBB': 2})
+e[['CCC', 'x\0y']] = 3
+
+try:
+    e.archive(filename)
+except TypeError:
+    pass
+else:
+    raise AssertionError('archived a key with \'\\0\'')
+
+# the previous archive is intact
+assert Route.restore(filename) == d
+assert [f for f in os.listdir('.') if f.startswith(filename + '.')] == []
+
+os.remove(filename)
+
+print('failed archive OK')
+
+# === empty nodes and int keys ===
+
+d = Route({'a': {'c': {}, 'd': 1}, 'e': {}})
+d[('f', 1, 'g')] = 'int'
+d[('f', -2)] = {}
+
+d.archive(filename)
+
+r = Route.restore(filename)
+assert r == d and r.to_base() == d.to_base()
+assert type(r['a.c']) is Route and type(r[('f', -2)]) is Route
+
+with route_v2.open_archive(filename) as arc:
+    assert sorted(arc, key=str) == ['a', 'e', 'f']
+    assert sorted(arc['f'], key=str) == [-2, 1]
+    assert arc[('f', 1, 'g')] == 'int' and ('f', 1) in arc and 'f.1' not in arc
+    assert list(arc['a.c']) == [] and arc['a.c'].to_route() == Route()
+    assert 'a.c.x' not in arc and 1.5 not in arc
+    assert dict(arc.iter_leaves('.')) == {'a.c': Route(), 'a.d': 1, 'e': Route(),
+                                          'f.1.g': 'int', 'f.-2': Route()}
+
+for key in [1.5, True, ('x', None)]:
+    e = Route()
+    e[key if isinstance(key, tuple) else (key,)] = 1
+
+    try:
+        e.archive(filename)
+    except TypeError:
+        pass
+    else:
+        raise AssertionError('archived the key {!r}'.format(key))
+
+assert Route.restore(filename) == d
+
+print('empty nodes and int keys OK')
+
+# === unwritable path ===
+
+# the error of open is raised, not the one of removing the temporary file
+try:
+    d.archive(os.path.join('my_missing_dir', filename))
+except FileNotFoundError as e:
+    assert e.__context__ is None
+else:
+    raise AssertionError('archived into a missing directory')
+
+print('unwritable path OK')
+
+# === truncated archive ===
+
+with open(filename, 'rb') as fp:
+    data = fp.read()
+
+broken = filename + '.broken'
+
+for size in [0, 4, 20, len(data) - 1]:
+    with open(broken, 'wb') as fp:
+        fp.write(data[:size])
+
+    try:
+        route_v2.open_archive(broken)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('opened an archive truncated to {} bytes'.format(size))
+
+os.remove(broken)
+os.remove(filename)
+
+print('truncated archive OK')
@@ -0,0 +1,58 @@
+from route_v2 import Route
+
+
+# === batches ===
+
+a = Route()
+a.set_many({'AAA.BBB.CCC': 10, 'AAA.BBB.DDD': 20, 'AAA.EEE': 30})
+assert a == {'AAA': {'BBB': {'CCC': 10, 'DDD': 20}, 'EEE': 30}}
+
+assert a.get_many(['AAA.BBB.CCC', 'AAA.BBB.XXX', 'XXX.YYY'], 'NotFound') == [10, 'NotFound', 'NotFound']
+
+a.delete_many(['AAA.BBB.CCC', 'AAA.EEE'])
+assert a == {'AAA': {'BBB': {'DDD': 20}}}
+
+print('=========================')
+print('batches OK')
+
+# === delete_many ===
+
+doc = {'a': {'b': 1, 'c': 2}, 'd': {'e': 3}, 'f': {'g': 4}}
+
+# nothing is deleted if any key does not exist
+for keys in [['a.b', 'd.x'], ['a.b', 'x.y'], ['a.b', 'a.b'], ['a', 'a.c'], ['a.b', 'a.b.x']]:
+    a = Route(doc)
+
+    try:
+        a.delete_many(keys)
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('deleted {}'.format(keys))
+
+    assert a == doc
+
+# deleting a child before its parent
+a = Route(doc)
+a.delete_many(['a.b', 'a', 'd.e'])
+assert a == {'d': {}, 'f': {'g': 4}}
+
+# shared nodes are cloned, the snapshot is untouched
+a = Route(doc)
+b = a.snapshot()
+a.delete_many(['a.b', 'd.e'])
+assert a == {'a': {'c': 2}, 'd': {}, 'f': {'g': 4}} and b == doc
+
+a = Route(doc)
+b = a.snapshot()
+
+try:
+    a.delete_many(['a.b', 'd.x'])
+except KeyError:
+    pass
+else:
+    raise AssertionError('deleted a missing key')
+
+assert a == doc and b == doc
+
+print('delete_many OK')
@@ -0,0 +1,124 @@
+import sys
+import threading
+from route_v2 import ConcurrentRoute
+
+
+THREADS = 8
+
+
+def run(threads, func):
+    workers = [threading.Thread(target=func, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+# switch threads often to expose races
+sys.setswitchinterval(1e-6)
+
+# === correctness ===
+
+# concurrent writers creating the same intermediate nodes
+r = ConcurrentRoute()
+
+def create(i):
+    for j in range(1000):
+        r[('shared', 'n{}'.format(j % 50), 'x{}'.format(j), 't{}'.format(i))] = j
+
+run(THREADS, create)
+assert len(r.plain()) == THREADS * 1000
+
+# setdefault returns the same item to all threads
+r = ConcurrentRoute()
+
+def append(i):
+    for j in range(1000):
+        r.setdefault(('lists', 'l{}'.format(j % 10)), []).append(j)
+
+run(THREADS, append)
+assert sum(len(v) for v in r['lists'].values()) == THREADS * 1000
+
+# pop hands each item to exactly one thread
+r = ConcurrentRoute({('items', 'i{}'.format(j)): j for j in range(10000)})
+popped = [[] for _ in range(THREADS)]
+
+def pop(i):
+    for j in range(10000):
+        item = r.pop(('items', 'i{}'.format(j)), None)
+        if item is not None:
+            popped[i].append(item)
+
+run(THREADS, pop)
+assert sorted(sum(popped, [])) == list(range(10000))
+
+# batches are applied as a whole, even when their nodes are replaced
+r = ConcurrentRoute({'cfg.a.x': 0, 'cfg.b.x': 0})
+errors = []
+
+def batch(i):
+    try:
+        for j in range(1000):
+            if i == 0:
+                r['cfg'] = {'a': {'x': -j}, 'b': {'x': -j}}
+            elif i == THREADS - 1:
+                # no batch is half applied while all locks are held
+                with r._lock_all():
+                    assert r.get('cfg.a.x') == r.get('cfg.b.x')
+            elif i == 1:
+                r.delete_many(['cfg.a.x', 'cfg.b.x'])
+                r.set_many([('cfg.a.x', j), ('cfg.b.x', j)])
+            else:
+                r.set_many([('cfg.a.x', (i, j)), ('cfg.b.x', (i, j)), ('other{}'.format(i), j)])
+    except Exception as e:
+        errors.append(e)
+
+run(THREADS, batch)
+assert not errors and r['cfg.a.x'] == r['cfg.b.x']
+
+print('=========================')
+print('correctness OK')
+
+# === delete_many ===
+
+doc = {'a': {'b': 1, 'c': 2}, 'd': {'e': 3}}
+
+# nothing is deleted if any key does not exist, whether only the parents
+# are locked, or all locks are held since a key is under another one
+for keys in [['a.b', 'd.x'], ['a.b', 'x.y'], ['a', 'a.b'], ['a.b', 'a.b']]:
+    r = ConcurrentRoute(doc)
+
+    try:
+        r.delete_many(keys)
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('deleted {}'.format(keys))
+
+    assert r == doc
+
+# concurrent batches deleting the same keys, each key is deleted by
+# exactly one of them and the others delete nothing
+r = ConcurrentRoute({('items', 'i{}'.format(j), 'k{}'.format(k)): k
+                     for j in range(1000) for k in range(2)})
+deleted = [[] for _ in range(THREADS)]
+errors = []
+
+def delete(i):
+    for j in range(1000):
+        keys = [('items', 'i{}'.format(j), 'k0'), ('items', 'i{}'.format(j), 'k1')]
+        try:
+            r.delete_many(keys)
+        except KeyError:
+            # the batch of another thread deleted both keys
+            if len(r[('items', 'i{}'.format(j))]) != 0:
+                errors.append(j)
+            continue
+        deleted[i].append(j)
+
+run(THREADS, delete)
+assert not errors
+assert sorted(sum(deleted, [])) == list(range(1000))
+assert all(len(v) == 0 for v in r['items'].values())
+
+print('delete_many OK')
@@ -0,0 +1,114 @@
+import io
+import copy
+import time
+import route_v2
+from route_v2 import Route
+
+
+DEPTH = 100000
+
+
+def timeit(name, func):
+    start = time.time()
+    result = func()
+    print('* {}: {:.3f} sec'.format(name, time.time()-start))
+    return result
+
+
+# nested dict with DEPTH levels: {'k': {'k': ... {'k': {'v': 1}}}}
+doc = {}
+node = doc
+for i in range(DEPTH):
+    node['k'] = {}
+    node = node['k']
+node['v'] = 1
+
+path = ('k',) * DEPTH + ('v',)
+
+print('=========================')
+print('depth = {}'.format(DEPTH))
+
+# === construction ===
+
+a = timeit('Route(doc)', lambda: Route(doc))
+assert a[path] == 1
+
+b = Route()
+timeit('__setitem__ (path)', lambda: b.__setitem__(path, 1))
+assert b[path] == 1
+
+c = Route()
+timeit('__setitem__ (Mapping)', lambda: c.__setitem__('a', doc))
+assert c[('a',) + path] == 1
+
+d = Route()
+timeit('update', lambda: d.update(doc))
+timeit('set_many', lambda: d.set_many([('a', a)]))
+assert d[('a',) + path] == 1
+
+# === path operations ===
+
+assert timeit('__contains__', lambda: path in a)
+assert timeit('get', lambda: a.get(path)) == 1
+assert timeit('get (miss)', lambda: a.get(path + ('x',), 'NotFound')) == 'NotFound'
+
+# === tree-wide operations ===
+
+assert timeit('__eq__', lambda: a == b)
+assert timeit('__ne__', lambda: not (a != b))
+
+base = timeit('to_base', lambda: a.to_base())
+node = base
+for i in range(DEPTH):
+    assert type(node) is dict
+    node = node['k']
+assert node == {'v': 1}
+
+plain = timeit('plain', lambda: a.plain('/'))
+assert plain == {'/'.join(path): 1}
+
+leaves = timeit('iter_leaves', lambda: list(a.iter_leaves()))
+assert leaves == [(path, 1)]
+
+e = timeit('deepcopy', lambda: copy.deepcopy(a))
+assert e == a
+e[path] = 2
+assert a[path] == 1
+
+f = timeit('freeze', lambda: a.freeze())
+assert timeit('hash', lambda: hash(f)) == hash(b.freeze())
+
+g = timeit('snapshot', lambda: a.snapshot())
+timeit('snapshot write', lambda: g.__setitem__(path, 2))
+assert g[path] == 2 and a[path] == 1
+
+assert timeit('pop', lambda: b.pop(path)) == 1
+assert path not in b
+
+# === json and repr ===
+
+s = timeit('to_json', lambda: a.to_json())
+assert s == '{"k": ' * DEPTH + '{"v": 1}' + '}' * DEPTH
+assert timeit('from_json', lambda: Route.from_json(s)) == a
+assert timeit('from_json (bytes)', lambda: Route.from_json(s.encode('utf-8'))) == a
+
+w = io.StringIO()
+timeit('to_json (fp)', lambda: a.to_json(w))
+assert w.getvalue() == s
+
+assert timeit('repr', lambda: repr(a)) == s.replace('"', '\'')
+
+# === lazy convertion ===
+
+route_v2.enable_lazy_convert()
+h = timeit('Route(doc) (lazy)', lambda: Route(doc))
+assert timeit('__eq__ (lazy)', lambda: h == a)
+
+# stored Mappings are returned as Routes
+x = h.setdefault('x', {'y': 1})
+assert type(x) is Route and type(h['x']) is Route
+x['z'] = 2
+assert h['x.z'] == 2 and h.setdefault('x.y') == 1
+route_v2.disable_lazy_convert()
+
+print('OK')
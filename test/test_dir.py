@@ -0,0 +1,145 @@
+import os
+import json
+import shutil
+from route_v1 import Route
+
+
+Route.set_sep('/')
+
+root = 'my_route_dir'
+outside = 'my_route_outside'
+
+shutil.rmtree(root, ignore_errors=True)
+shutil.rmtree(outside, ignore_errors=True)
+
+# === directory archive ===
+
+r = Route({'a': 1, 'b': {'c': b'foo', 'd': [1, 2]}, 'e': {'f': {'g': b'bar'}}})
+r.archive_dir(root)
+
+assert os.path.isfile(os.path.join(root, 'a.pkl'))
+assert os.path.isfile(os.path.join(root, 'b', 'c.bytes'))
+assert Route.restore_dir(root) == r
+assert Route.restore_dir(root, workers=4) == r
+assert Route.restore_dir(root, lazy=True) == r
+assert Route.restore_dir(root, include='b') == Route({'b': r['b']})
+
+# the files are the same with or without workers
+def read_files(root):
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, 'rb') as fp:
+                files[os.path.relpath(path, root)] = fp.read()
+    return files
+
+files = read_files(root)
+r.archive_dir(root, workers=4)
+assert read_files(root) == files
+
+# the files of the removed leaves are deleted, with the empty directories
+del r['e']
+del r['b/c']
+r.archive_dir(root)
+
+assert not os.path.exists(os.path.join(root, 'b', 'c.bytes'))
+assert not os.path.exists(os.path.join(root, 'e'))
+assert Route.restore_dir(root) == r
+
+# the files not listed in the index are kept
+with open(os.path.join(root, 'b', 'other.bytes'), 'wb') as fp:
+    fp.write(b'other')
+
+del r['b/d']
+r.archive_dir(root)
+assert not os.path.exists(os.path.join(root, 'b', 'd.pkl'))
+assert os.path.isfile(os.path.join(root, 'b', 'other.bytes'))
+assert Route.restore_dir(root) == Route({'a': 1})
+
+# without the index, the directory is walked
+os.remove(os.path.join(root, '.route', 'index.json'))
+assert Route.restore_dir(root) == Route({'a': 1, 'b': {'other': b'other'}})
+
+shutil.rmtree(root)
+
+print('=========================')
+print('directory archive OK')
+
+# === leaf names ===
+
+for key in ['../evil', 'a/../../evil', 'a/./b', 'a//b', '.route/index']:
+    r = Route({'ok': 1})
+    r[key] = 'x'
+
+    try:
+        r.archive_dir(root)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('archived the leaf {!r}'.format(key))
+
+    assert not os.path.exists(os.path.join(os.path.dirname(os.path.abspath(root)), 'evil'))
+
+shutil.rmtree(root, ignore_errors=True)
+
+print('leaf names OK')
+
+# === tampered index ===
+
+os.makedirs(outside)
+victim = os.path.join(outside, 'victim')
+with open(victim, 'w') as fp:
+    fp.write('keep')
+
+r = Route({'a': 1, 'b': 'foo'})
+r.archive_dir(root)
+
+index = os.path.join(root, '.route', 'index.json')
+with open(index, 'r') as fp:
+    leaves = json.load(fp)['leaves']
+
+leaves.append(['victim', os.path.join('..', outside, 'victim')])
+leaves.append(['abs', os.path.abspath(victim)])
+
+with open(index, 'w') as fp:
+    json.dump({'leaves': leaves}, fp)
+
+# the stale names outside the archive are never deleted
+Route({'a': 1}).archive_dir(root)
+assert os.path.isfile(victim)
+assert not os.path.exists(os.path.join(root, 'b.txt'))
+assert Route.restore_dir(root) == Route({'a': 1})
+
+# nor read
+leaves = [leaf for leaf in leaves if leaf[0] != 'b']
+with open(index, 'w') as fp:
+    json.dump({'leaves': leaves}, fp)
+
+for lazy in [False, True]:
+    try:
+        Route.restore_dir(root, lazy=lazy)['victim']
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('restored a leaf outside the archive')
+
+# nor followed through a symbolic link
+shutil.rmtree(root)
+os.makedirs(root)
+os.symlink(os.path.abspath(outside), os.path.join(root, 'link'))
+
+try:
+    Route({'link': {'victim': 1}}).archive_dir(root)
+except ValueError:
+    pass
+else:
+    raise AssertionError('wrote through a symbolic link')
+
+with open(victim, 'r') as fp:
+    assert fp.read() == 'keep'
+
+shutil.rmtree(root)
+shutil.rmtree(outside)
+
+print('tampered index OK')
@@ -0,0 +1,74 @@
+import route_v2
+from route_v2 import FlatRoute
+
+
+r = FlatRoute({'a.b': 1, 'c': 2})
+assert r.plain() == {'a.b': 1, 'c': 2}
+
+# === leaf in the way ===
+
+route_v2.disable_auto_convert()
+
+index = {k: dict(v) for k, v in r._index.items()}
+leaves = dict(r._leaves)
+
+try:
+    r['c.d.e'] = 3
+except TypeError:
+    pass
+else:
+    raise AssertionError('assigned under a leaf')
+
+# nothing is registered before raising
+assert r._index == index and r._leaves == leaves
+assert list(r.keys()) == ['a', 'c'] and r['c'] == 2
+
+route_v2.enable_auto_convert()
+
+r['c.d.e'] = 3
+assert r.plain() == {'a.b': 1, 'c.d.e': 3}
+assert list(r.keys()) == ['a', 'c']
+
+print('=========================')
+print('FlatRoute OK')
+
+# === copy and pop ===
+
+import copy
+
+r = FlatRoute({'a.b': 1, 'c': 2, 'd': {}})
+
+c = copy.copy(r)
+assert c == r and c._leaves is not r._leaves
+c['a.b'] = 3
+assert r['a.b'] == 1 and c.keys() == ['a', 'c', 'd']
+
+v = copy.copy(r['a'])
+assert v.plain() == {'b': 1} and v._prefix == ()
+
+d = copy.deepcopy(FlatRoute({'a.b': [1]}))
+assert d['a.b'] == [1]
+
+a = r.pop('a')
+assert type(a) is FlatRoute and a.plain() == {'b': 1}
+assert 'a' not in r and 'a.b' not in r and r.keys() == ['c', 'd']
+a['x'] = 1
+assert 'x' not in r
+
+r.clear()
+assert r.keys() == [] and r.plain() == {}
+r['z'] = 1
+assert r.plain() == {'z': 1}
+
+print('copy and pop OK')
+
+# === order ===
+
+r = FlatRoute({'a.b': 1, 'c': 2, 'x.y': 3})
+r['a'] = {'q': 4}
+
+assert r.keys() == ['a', 'c', 'x']
+assert list(r.plain()) == ['a.q', 'c', 'x.y']
+assert list(r.to_base()) == r.keys()
+
+print('order OK')
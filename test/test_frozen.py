@@ -0,0 +1,80 @@
+import pickle
+import route_v2
+from route_v2 import Route
+from route_v2 import FrozenRoute
+
+
+f = Route({'a.b': 1, 'x.y': 2}).freeze()
+
+# === pickle ===
+
+g = pickle.loads(pickle.dumps(f))
+assert type(g) is FrozenRoute and type(g['x']) is FrozenRoute
+assert g == f and hash(g) == hash(f)
+
+cache = {f: 'result'}
+assert cache[pickle.loads(pickle.dumps(f))] == 'result'
+
+print('=========================')
+print('pickle OK')
+
+# === write paths ===
+
+def immutable(func):
+    try:
+        func()
+    except TypeError:
+        return True
+    return False
+
+# assigned as it is, without conversion
+route_v2.disable_auto_convert()
+
+r = Route()
+r['f'] = f
+h = hash(f)
+
+assert immutable(lambda: r.__setitem__('f.x.z', 2))
+assert immutable(lambda: r.__delitem__('f.x.y'))
+assert immutable(lambda: r.pop('f.x.y'))
+assert immutable(lambda: r.setdefault('f.x.z', 1))
+assert immutable(lambda: r.set_many([('f.x.z', 1)]))
+assert immutable(lambda: r.delete_many(['f.x.y']))
+
+assert f == Route({'a.b': 1, 'x.y': 2}) and hash(f) == h
+assert f.plain() == {'a.b': 1, 'x.y': 2}
+
+route_v2.enable_auto_convert()
+
+# converted into a mutable copy
+r = Route()
+r['f'] = f
+r['f.x.z'] = 2
+assert 'x.z' not in f
+
+print('write paths OK')
+
+# === frozen type ===
+
+doc = {'b': 1, 'a': {'c': 2}}
+
+for R in [Route, route_v2.OrderedRoute, route_v2.ConcurrentRoute]:
+    g = R(doc).freeze()
+    assert type(g) is FrozenRoute and type(g['a']) is FrozenRoute
+    assert list(g) == ['b', 'a'] and g == R(doc)
+    assert hash(g) == hash(Route(doc).freeze())
+
+print('frozen type OK')
+
+# === unhashable leaves ===
+
+g = Route({'a.b': [1, 2]}).freeze()
+
+try:
+    hash(g)
+except TypeError as e:
+    assert '\'b\'' in str(e) and 'list' in str(e)
+else:
+    raise AssertionError('hashed a list')
+
+print('unhashable leaves OK')
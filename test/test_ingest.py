@@ -0,0 +1,72 @@
+import io
+import json
+import random
+from route_v2 import Route
+
+
+def ingest(s, **kwargs):
+    r = Route()
+    r.ingest(io.StringIO(s), **kwargs)
+    return r
+
+
+# random documents, parsed with chunks cut at every position
+random.seed(0)
+
+leaves = [1, -2.5e10, 12345678901234567890, 'str"\\é中', None, True,
+          [1, {'a': [2]}], {}, 'x' * 50]
+
+def random_doc(depth=0):
+    if depth > 3 or random.random() < 0.3:
+        return random.choice(leaves)
+    return {'k{}'.format(i) + ('.z' if random.random() < 0.1 else ''): random_doc(depth+1)
+            for i in range(random.randint(0, 5))}
+
+for _ in range(100):
+    doc = {'r': random_doc(), 's': random_doc(), 'e': {}}
+    s = json.dumps(doc, indent=random.choice([None, 1]))
+
+    for chunk_size in [1, 2, 3, 7, 64]:
+        assert ingest(s, chunk_size=chunk_size) == Route(doc)
+
+        r = Route()
+        r.ingest(io.BytesIO(s.encode('utf-8')), chunk_size=chunk_size)
+        assert r == Route(doc)
+
+print('=========================')
+print('random documents OK')
+
+# prefix, include and lines
+doc = {'a': {'b': {'c': 1, 'd': [1, 2]}, 'x': {'c': 2}}, 'q': 'z', 'e': {'f': {}}}
+s = json.dumps(doc)
+
+r = Route({'old': 1})
+r.ingest(io.StringIO(s), prefix='p.q')
+assert r == Route({'old': 1, 'p.q': doc})
+
+assert ingest(s, include='a.*.c') == Route({'a.b.c': 1, 'a.x.c': 2})
+assert ingest(s, include=['a.b', 'e']) == Route({'a.b': doc['a']['b'], 'e': doc['e']})
+assert ingest(s, include=lambda path: path[-1] == 'c') == Route({'a.b.c': 1, 'a.x.c': 2})
+
+r = ingest('{"a": 1}\n{"a": 2}\n[3]\n', prefix='log', lines=True)
+assert r == Route({('log', 0, 'a'): 1, ('log', 1, 'a'): 2, ('log', 2): [3]})
+
+print('prefix, include and lines OK')
+
+# malformed documents
+for s in ['{"a": 1,}', '{"a" 1}', '{"a": 1} x', '{"a": tru}', '{"a": "x', '{"a": 1']:
+    try:
+        ingest(s, chunk_size=2)
+    except json.JSONDecodeError:
+        pass
+    else:
+        assert False, s
+
+try:
+    ingest('[1]')
+except TypeError:
+    pass
+else:
+    assert False
+
+print('malformed documents OK')
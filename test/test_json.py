@@ -0,0 +1,134 @@
+import io
+import os
+import json
+import route_v2
+from route_v2 import Route
+from route_v2 import FrozenRoute
+
+
+class Writer(object):
+    # file object counting the writes
+    def __init__(self, binary=False):
+        self.buf = io.BytesIO() if binary else io.StringIO()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        self.buf.write(data)
+
+    def getvalue(self):
+        return self.buf.getvalue()
+
+
+doc = {'a': {'b': 1, 'c': [1, {'d': 2}], 'e': {}},
+       'f': {'k': 2.5},
+       'f.g': {'h': 'str"\\é中', 'i.j': None},
+       'l': True}
+
+s = json.dumps(doc)
+
+# === json ===
+
+r = Route.from_json(s)
+
+# separator keys are paths, like Route(dict)
+assert r == Route(json.loads(s)) == Route(doc)
+assert r['f.g.h'] == 'str"\\é中' and r['f.g.i.j'] is None and r['f.k'] == 2.5
+assert type(r['a']) is Route and type(r['f.g.i']) is Route
+# objects in arrays are Routes as well
+assert type(r['a.c'][1]) is Route and r['a.c'][1]['d'] == 2
+
+assert Route.from_json(s.encode('utf-8')) == r
+assert Route.from_json(io.StringIO(s)) == r
+
+# round trip
+assert json.loads(r.to_json()) == r.to_base()
+assert Route.from_json(r.to_json()) == r
+assert json.loads(r.to_json(sort_keys=True, indent=1)) == r.to_base()
+
+f = FrozenRoute.from_json(s)
+assert type(f) is FrozenRoute and type(f['a']) is FrozenRoute and f == r
+
+try:
+    Route.from_json('[1, 2]')
+except TypeError:
+    pass
+else:
+    raise AssertionError('loaded an array')
+
+print('=========================')
+print('json OK')
+
+# === disabled auto conversion ===
+
+route_v2.disable_auto_convert()
+
+r = Route.from_json(s)
+assert r == Route(json.loads(s))
+# nested objects are kept as base dicts
+assert type(r['a']) is dict and type(r['a']['c'][1]) is dict
+assert json.loads(r.to_json()) == r.to_base()
+
+route_v2.enable_auto_convert()
+
+print('disabled auto conversion OK')
+
+# === streaming ===
+
+r = Route({'n{}'.format(i): {'k{}'.format(j): j for j in range(10)} for i in range(100)})
+
+w = Writer()
+assert r.to_json(w) is None
+assert w.writes > 1 and json.loads(w.getvalue()) == r.to_base()
+
+filename = 'my_route.json'
+
+with open(filename, 'w') as fp:
+    r.to_json(fp)
+
+with open(filename, 'r') as fp:
+    assert Route.from_json(fp) == r
+
+os.remove(filename)
+
+print('streaming OK')
+
+# === msgpack ===
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+if msgpack is None:
+    print('msgpack is not installed, skipped')
+else:
+    r = Route.from_msgpack(msgpack.packb(doc))
+
+    assert r == Route(doc)
+    assert type(r['a.c'][1]) is Route and r['f.g.i.j'] is None
+    assert Route.from_msgpack(io.BytesIO(msgpack.packb(doc))) == r
+
+    # round trip
+    assert msgpack.unpackb(r.to_msgpack(), raw=False) == r.to_base()
+    assert Route.from_msgpack(r.to_msgpack()) == r
+
+    f = FrozenRoute.from_msgpack(r.to_msgpack())
+    assert type(f) is FrozenRoute and f == r
+
+    route_v2.disable_auto_convert()
+
+    r = Route.from_msgpack(msgpack.packb(doc))
+    assert r == Route(doc) and type(r['a']) is dict
+    assert msgpack.unpackb(r.to_msgpack(), raw=False) == r.to_base()
+
+    route_v2.enable_auto_convert()
+
+    # streaming
+    r = Route({'n{}'.format(i): {'k{}'.format(j): j for j in range(10)} for i in range(1000)})
+
+    w = Writer(binary=True)
+    assert r.to_msgpack(w) is None
+    assert w.writes > 1 and msgpack.unpackb(w.getvalue(), raw=False) == r.to_base()
+
+    print('msgpack OK')
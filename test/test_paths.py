@@ -0,0 +1,57 @@
+from route_v2 import Route
+from route_v2 import FlatRoute
+from route_v2 import FrozenRoute
+from route_v2 import ConcurrentRoute
+
+
+doc = {'a': {1: {2: 'x'}, 'b': 1}, 3: 'y', 'c': {(4, 5): 'z'}}
+
+for R in [Route, FlatRoute, ConcurrentRoute, FrozenRoute]:
+    r = R(doc)
+
+    # === tuple paths ===
+
+    assert r[('a', 1, 2)] == 'x' and r[['a', 1, 2]] == 'x' and r['a.b'] == 1
+    assert ('a', 1) in r and ('a', 1, 3) not in r
+    # tuple keys nest
+    assert r[('c', 4, 5)] == 'z'
+
+    # === empty path ===
+
+    assert () not in r and [] not in r
+    assert r.get(()) is None and r.get((), 'd') == 'd' and r.get([], 'd') == 'd'
+
+    try:
+        r[()]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('found the empty path')
+
+    if R is not FrozenRoute:
+        assert r.pop((), 'd') == 'd'
+
+        try:
+            del r[()]
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('deleted the empty path')
+
+    # === non-str segments ===
+
+    # joined with str(), the top-level keys are kept
+    assert r.plain() == {'a.1.2': 'x', 'a.b': 1, 3: 'y', 'c.4.5': 'z'}
+    assert r.plain('/') == {'a/1/2': 'x', 'a/b': 1, 3: 'y', 'c/4/5': 'z'}
+    assert dict(r.iter_leaves('/')) == r.plain('/')
+    assert dict(r.iter_leaves()) == {('a', 1, 2): 'x', ('a', 'b'): 1, (3,): 'y', ('c', 4, 5): 'z'}
+    assert r['a'].plain() == {'1.2': 'x', 'b': 1}
+
+    print('{} OK'.format(R.__name__))
+
+# a tuple path of a tuple key
+r = Route()
+r[((1, 2),)] = 'x'
+assert r == {(1, 2): 'x'} and r[((1, 2),)] == 'x'
+
+print('tuple key OK')
@@ -0,0 +1,56 @@
+from route_v2 import Route
+from route_v2 import ConcurrentRoute
+
+
+doc = {'a': {'b': {'c': 1}, 'd': [1, 2]}, 'e': {'f': 2}}
+
+for R in [Route, ConcurrentRoute]:
+
+    # === write paths ===
+
+    r = R(doc)
+    s = r.snapshot()
+
+    s['a.b.c'] = 10
+    r['e.g'] = 3
+    assert r == {'a': {'b': {'c': 1}, 'd': [1, 2]}, 'e': {'f': 2, 'g': 3}}
+    assert s == {'a': {'b': {'c': 10}, 'd': [1, 2]}, 'e': {'f': 2}}
+
+    # subtrees returned by __getitem__ are owned
+    r = R(doc)
+    s = r.snapshot()
+    s['a']['b']['c'] = 10
+    assert r['a.b.c'] == 1 and s['a.b.c'] == 10
+
+    # === items and values ===
+
+    # the children returned by items() and values() are owned as well
+    r = R(doc)
+    s = r.snapshot()
+
+    for k, v in s.items():
+        v['x'] = k
+
+    for v in r.values():
+        v['y'] = 1
+
+    assert r == {'a': {'b': {'c': 1}, 'd': [1, 2], 'y': 1}, 'e': {'f': 2, 'y': 1}}
+    assert s == {'a': {'b': {'c': 1}, 'd': [1, 2], 'x': 'a'}, 'e': {'f': 2, 'x': 'e'}}
+
+    # down to the nested nodes
+    r = R(doc)
+    s = r.snapshot()
+    dict(s.items())['a']['b']['c'] = 10
+    assert r['a.b.c'] == 1 and s['a.b.c'] == 10
+
+    # === read-only traversals ===
+
+    # share the nodes
+    r = R(doc)
+    s = r.snapshot()
+    assert s.to_base() == doc and s.plain() == r.plain() and s == r
+    assert s.freeze() == r
+    assert s['a'] is not r['a']
+    assert list(dict.values(s))[1] is list(dict.values(r))[1]
+
+    print('{} OK'.format(R.__name__))
@@ -0,0 +1,510 @@
+import os
+import copy
+import json
+import zlib
+import zipfile
+from route_v1 import Route
+
+
+Route.set_sep('/')
+
+filename = 'my_route.zip'
+
+
+class Unpicklable(object):
+    def __reduce__(self):
+        raise RuntimeError('unpicklable')
+
+
+class Chunks(list):
+    # bytes written in chunks by the streamer
+    writes = 0
+
+
+def chunks_serializer(chunks):
+    return b''.join(chunks)
+
+def chunks_deserializer(serialized_chunks):
+    return Chunks([serialized_chunks])
+
+def chunks_streamer(chunks, fp):
+    for chunk in chunks:
+        Chunks.writes += 1
+        fp.write(chunk)
+
+Route.set_serializer(Chunks, chunks_serializer, ext='.chunks', overwrite=True)
+Route.set_deserializer(Chunks, chunks_deserializer, ext='.chunks', overwrite=True)
+Route.set_streamer(Chunks, chunks_streamer, overwrite=True)
+
+
+# === streaming archive ===
+
+chunks = Chunks([bytes([i]) * 1000 for i in range(100)])
+r = Route({'a': {'chunks': chunks, 'b': b'foo'}, 'c': 1})
+
+r.archive_zip(filename)
+assert Chunks.writes == len(chunks)
+
+with zipfile.ZipFile(filename, 'r') as zf:
+    assert zf.read('a/chunks.chunks') == chunks_serializer(chunks)
+    assert zf.read('a/b.bytes') == b'foo'
+
+assert Route.restore(filename) == Route({'a': {'chunks': [chunks_serializer(chunks)], 'b': b'foo'}, 'c': 1})
+
+# the members are the same whether the leaves are streamed or serialized
+with zipfile.ZipFile(filename, 'r') as zf:
+    streamed = {name: zf.read(name) for name in zf.namelist()}
+
+Route._streamer.pop(Chunks)
+Route._dispatch_cache.clear()
+
+writes = Chunks.writes
+r.archive_zip(filename)
+assert Chunks.writes == writes
+
+with zipfile.ZipFile(filename, 'r') as zf:
+    assert {name: zf.read(name) for name in zf.namelist()} == streamed
+
+Route.set_streamer(Chunks, chunks_streamer)
+
+# the pickled leaves are streamed as well, the same as pickle.dumps
+import route_v1
+
+# pickle, dill or cloudpickle
+pickle = route_v1.pickle
+
+assert Route._get_dispatch(list)[2] is route_v1.pickle_streamer
+
+big = [bytes([i % 256]) * 1000 for i in range(100000)]
+r = Route({'big': big, 'small': {'x': 1}})
+
+for compression in [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED]:
+    r.archive_zip(filename, compression=compression)
+
+    with zipfile.ZipFile(filename, 'r') as zf:
+        assert zf.read('big.pkl') == pickle.dumps(big)
+        assert zf.read('small/x.pkl') == pickle.dumps(1)
+
+    with open(filename, 'rb') as fp:
+        serial = fp.read()
+
+    # the same archive as the leaves pickled in parallel
+    r.archive_zip(filename, compression=compression, workers=4)
+    with open(filename, 'rb') as fp:
+        assert fp.read() == serial
+
+    assert Route.restore(filename) == r
+
+# a new serializer drops the streamer of the last one
+route_v1.set_default_serializer(pickle.dumps, '.pkl', overwrite=True)
+assert Route._get_dispatch(list)[2] is None
+route_v1.set_default_streamer(route_v1.pickle_streamer)
+
+os.remove(filename)
+
+print('=========================')
+print('streaming archive OK')
+
+# === parallel archive and restore ===
+
+r = Route({'n{}'.format(i): {'k{}'.format(j): bytes([j]) * (i * 100 + j) for j in range(10)}
+           for i in range(20)})
+r['n0/text'] = 'foo'
+r['n1/list'] = [1, 2, {'x': 3}]
+
+archives = []
+for workers in [None, 1, 4]:
+    r.archive_zip(filename, workers=workers, compression=zipfile.ZIP_DEFLATED)
+
+    with open(filename, 'rb') as fp:
+        archives.append(fp.read())
+
+# the archive is the same with or without workers
+assert archives[0] == archives[1] == archives[2]
+
+restored = Route.restore(filename)
+assert restored == Route.restore(filename, workers=1) == Route.restore(filename, workers=4)
+assert list(restored.plain()) == list(Route.restore(filename, workers=4).plain())
+assert restored['n3/k5'] == r['n3/k5'] and restored['n1/list'] == r['n1/list']
+
+# the exceptions of the workers are raised
+with zipfile.ZipFile(filename, 'a') as zf:
+    zf.writestr('bad.pkl', b'not a pickle')
+
+try:
+    Route.restore(filename, workers=4)
+except Exception:
+    pass
+else:
+    raise AssertionError('restored a broken member')
+
+os.remove(filename)
+
+print('parallel archive and restore OK')
+
+# === memory-mapped restore ===
+
+import mmap
+import struct
+
+
+class Blob(bytes):
+    pass
+
+
+# the offsets of the mapped members
+offsets = []
+
+def blob_serializer(blob):
+    return struct.pack('<Q', len(blob)) + blob
+
+def blob_deserializer(serialized_blob):
+    return Blob(serialized_blob[8:])
+
+def blob_mmap_deserializer(path, offset):
+    offsets.append(offset)
+
+    with open(path, 'rb') as fp:
+        mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    size, = struct.unpack('<Q', mm[offset:offset+8])
+
+    return memoryview(mm)[offset+8:offset+8+size]
+
+Route.set_serializer(Blob, blob_serializer, ext='.blob', overwrite=True)
+Route.set_deserializer(Blob, blob_deserializer, ext='.blob', overwrite=True)
+Route._mmap_deserializer['.blob'] = blob_mmap_deserializer
+
+r = Route({'a': Blob(b'x' * 1000), 'b': {'c': Blob(b'y' * 3), 'd': [1, 2]}})
+
+for workers in [None, 4]:
+    r.archive_zip(filename, workers=workers, mmap=True, compression=zipfile.ZIP_DEFLATED)
+
+    with zipfile.ZipFile(filename, 'r') as zf:
+        for name in ['a.blob', 'b/c.blob']:
+            zinfo = zf.getinfo(name)
+            assert zinfo.compress_type == zipfile.ZIP_STORED
+
+            # the local file header is padded by the alignment extra field
+            with open(filename, 'rb') as fp:
+                fp.seek(zinfo.header_offset)
+                header = fp.read(30)
+                name_len, extra_len = struct.unpack('<HH', header[26:30])
+                fp.seek(name_len, 1)
+                extra = fp.read(extra_len)
+
+            header_id, = struct.unpack('<H', extra[:2])
+            assert header_id == 0xD935
+            assert (zinfo.header_offset + 30 + name_len + extra_len) % 64 == 0
+
+        # the other members are compressed as usual
+        assert zf.getinfo('b/d.pkl').compress_type == zipfile.ZIP_DEFLATED
+
+    del offsets[:]
+    restored = Route.restore(filename, mmap=True)
+    assert len(offsets) == 2 and all(offset % 64 == 0 for offset in offsets)
+    assert type(restored['a']) is memoryview and restored['a'].readonly
+    assert bytes(restored['a']) == r['a'] and bytes(restored['b/c']) == r['b/c']
+    restored['a'].release()
+    restored['b/c'].release()
+
+    # restored as usual without mmap
+    restored = Route.restore(filename)
+    assert type(restored['a']) is Blob and restored == r
+
+# the compressed members are not mapped
+r.archive_zip(filename, compression=zipfile.ZIP_DEFLATED)
+
+del offsets[:]
+restored = Route.restore(filename, mmap=True)
+assert offsets == [] and type(restored['a']) is Blob and restored == r
+
+os.remove(filename)
+
+print('memory-mapped restore OK')
+
+# === incremental archive ===
+
+if os.path.exists(filename):
+    os.remove(filename)
+
+r = Route({'a': 1, 'b': {'c': b'x', 'd': [1, 2]}})
+r.archive_zip(filename, incremental=True)
+assert Route.restore(filename) == r
+
+# only the changed leaves are appended
+r['b/c'] = b'y'
+r.archive_zip(filename, incremental=True)
+assert Route.restore(filename) == r
+
+with zipfile.ZipFile(filename, 'r') as zf:
+    names = zf.namelist()
+
+    # the previous generation is still readable
+    previous = json.loads(zf.read('.route/manifest/0.json').decode('utf-8'))
+    assert previous['generation'] == 0
+    assert {k: zf.read(name) for k, name, _ in previous['leaves'] if k == 'b/c'} == {'b/c': b'x'}
+
+assert '.route/1/b/c.bytes' in names and '.route/1/a.pkl' not in names
+
+# removed leaves are not restored
+del r['b/d']
+r.archive_zip(filename, incremental=True)
+assert Route.restore(filename) == r
+
+# a failed generation keeps the previous generations readable
+s = Route(r)
+s['b/c'] = b'z'
+s['e'] = Unpicklable()
+
+try:
+    s.archive_zip(filename, incremental=True)
+except RuntimeError:
+    pass
+else:
+    raise AssertionError('archived an unpicklable leaf')
+
+assert Route.restore(filename) == r
+assert [f for f in os.listdir('.') if f.startswith(filename + '.')] == []
+
+# archive without incremental to compact it
+r.archive_zip(filename)
+with zipfile.ZipFile(filename, 'r') as zf:
+    assert not any(name.startswith('.route/') for name in zf.namelist())
+assert Route.restore(filename) == r
+
+os.remove(filename)
+
+print('incremental archive OK')
+
+# === compression policies ===
+
+class Stored(bytes):
+    pass
+
+
+class Best(bytes):
+    pass
+
+
+Route.set_serializer(Stored, bytes, ext='.stored', overwrite=True, compression=zipfile.ZIP_STORED)
+Route.set_deserializer(Stored, Stored, ext='.stored', overwrite=True)
+Route.set_serializer(Best, bytes, ext='.best', overwrite=True,
+                     compression=(zipfile.ZIP_DEFLATED, 9))
+Route.set_deserializer(Best, Best, ext='.best', overwrite=True)
+
+text = b' '.join(str(i).encode('utf-8') for i in range(10000))
+
+r = Route({'stored': Stored(text), 'best': Best(text), 'list': list(range(1000)),
+           # bytes are stored if they do not compress well ('auto')
+           'random': os.urandom(100000), 'text': text})
+
+for kwargs in [{}, {'workers': 4}, {'incremental': True}]:
+    if os.path.exists(filename):
+        os.remove(filename)
+
+    r.archive_zip(filename, compression=zipfile.ZIP_DEFLATED, compresslevel=1, **kwargs)
+
+    with zipfile.ZipFile(filename, 'r') as zf:
+        assert zf.getinfo('stored.stored').compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo('random.bytes').compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo('text.bytes').compress_type == zipfile.ZIP_DEFLATED
+        assert zf.getinfo('list.pkl').compress_type == zipfile.ZIP_DEFLATED
+
+        # the level of the policy overrides the level of the zip file
+        for name, level in [('best.best', 9), ('text.bytes', 1)]:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+            assert zf.getinfo(name).compress_type == zipfile.ZIP_DEFLATED
+            assert zf.getinfo(name).compress_size == len(compressor.compress(text) + compressor.flush())
+
+    restored = Route.restore(filename)
+    assert restored == r and type(restored['stored']) is Stored and type(restored['best']) is Best
+
+# uncompressed zip files still follow the policies
+r.archive_zip(filename)
+
+with zipfile.ZipFile(filename, 'r') as zf:
+    assert zf.getinfo('best.best').compress_type == zipfile.ZIP_DEFLATED
+    assert zf.getinfo('text.bytes').compress_type == zipfile.ZIP_STORED
+
+os.remove(filename)
+
+print('compression policies OK')
+
+# === serializer dispatch ===
+
+class MyBytes(bytes):
+    pass
+
+
+class MyStored(Stored):
+    pass
+
+
+# the nearest registered base class in the MRO
+assert Route._get_serializer_with_ext(MyBytes)[1] == '.bytes'
+assert Route._get_serializer_with_ext(MyStored)[1] == '.stored'
+assert Route._get_compression(MyStored) == zipfile.ZIP_STORED
+assert Route._get_serializer_with_ext(Unpicklable)[1] == '.pkl'
+assert Route._get_dispatch(Chunks)[2] is chunks_streamer
+
+r = Route({'a': MyBytes(b'foo'), 'b': MyStored(text)})
+r.archive_zip(filename, compression=zipfile.ZIP_DEFLATED)
+
+with zipfile.ZipFile(filename, 'r') as zf:
+    assert sorted(zf.namelist()) == ['a.bytes', 'b.stored']
+    assert zf.getinfo('b.stored').compress_type == zipfile.ZIP_STORED
+
+restored = Route.restore(filename)
+assert restored == r and type(restored['a']) is bytes and type(restored['b']) is Stored
+
+# registering a subclass takes effect on the memoized types
+Route.set_serializer(MyBytes, lambda v: v[::-1], ext='.mybytes', overwrite=True)
+Route.set_deserializer(MyBytes, lambda v: MyBytes(v[::-1]), ext='.mybytes', overwrite=True)
+
+assert Route._get_serializer_with_ext(MyBytes)[1] == '.mybytes'
+assert Route._get_serializer_with_ext(bytes)[1] == '.bytes'
+
+r.archive_zip(filename)
+
+with zipfile.ZipFile(filename, 'r') as zf:
+    assert zf.read('a.mybytes') == b'oof'
+
+restored = Route.restore(filename)
+assert restored == r and type(restored['a']) is MyBytes
+
+os.remove(filename)
+
+print('serializer dispatch OK')
+
+# === columnar blocks ===
+
+import shutil
+
+r = Route({'a': 1, 'b': 2.5, 'c': {'d': True, 'e': None, 'f': 'foo', 'g': b'bar', 'h': 'x' * 1000},
+           'i': {'j': 1}, 'k': {'l': {'m': 1, 'n': 2}}})
+# a leaf with the key of the blocks
+r['c/.columns'] = [1, 2]
+
+r.archive_zip(filename, columnar=True)
+
+with zipfile.ZipFile(filename, 'r') as zf:
+    names = zf.namelist()
+
+# the scalar leaves of each node are batched, a single leaf is not
+assert sorted(names) == ['.columns.cols', 'c/.columns.cols', 'c/.columns.pkl', 'c/g.bytes',
+                         'c/h.txt', 'i/j.pkl', 'k/l/.columns.cols']
+
+restored = Route.restore(filename)
+assert restored['c/.columns'] == [1, 2] and restored['c/d'] is True and restored['c/f'] == 'foo'
+assert restored['a'] == 1 and restored['k/l/n'] == 2 and restored['c/h'] == r['c/h'].encode('utf-8')
+assert Route.restore(filename, lazy=True) == restored
+assert Route.restore(filename, workers=4) == restored
+
+# the leaves of the blocks are selected one by one
+assert Route.restore(filename, include='c/d') == Route({'c': {'d': True}})
+assert Route.restore(filename, include='c/.columns') == Route({'c': {'.columns': [1, 2]}})
+assert Route.restore(filename, include='k/*/m') == Route({'k': {'l': {'m': 1}}})
+assert Route.restore(filename, exclude=['c', 'k/l/n']) == Route({'a': 1, 'b': 2.5, 'i': {'j': 1},
+                                                                 'k': {'l': {'m': 1}}})
+
+# the blocks which no leaf is included from are not read
+read = []
+_restore_member = Route._restore_member
+
+def restore_member(zf, name, mmap=False):
+    read.append(name)
+    return _restore_member(zf, name, mmap)
+
+Route._restore_member = restore_member
+
+assert Route.restore(filename, include='k/l') == Route({'k': r['k']})
+assert read == ['k/l/.columns.cols']
+
+del read[:]
+assert Route.restore(filename, include=['c/g', 'i/j']) == Route({'c': {'g': b'bar'}, 'i': {'j': 1}})
+assert sorted(read) == ['c/.columns.cols', 'c/g.bytes', 'i/j.pkl']
+
+Route._restore_member = staticmethod(_restore_member)
+
+# the block and the leaf with the key of the blocks are kept apart in incremental archives
+os.remove(filename)
+r.archive_zip(filename, incremental=True, columnar=True)
+r.archive_zip(filename, incremental=True, columnar=True)
+
+with zipfile.ZipFile(filename, 'r') as zf:
+    assert not any(name.startswith('.route/1/') for name in zf.namelist())
+assert Route.restore(filename) == restored
+
+os.remove(filename)
+
+# and in the directory archives
+dirname = 'my_route_dir'
+shutil.rmtree(dirname, ignore_errors=True)
+
+r.archive_dir(dirname, columnar=True)
+assert Route.restore_dir(dirname) == restored
+
+del r['c/.columns']
+r.archive_dir(dirname, columnar=True)
+assert sorted(os.listdir(os.path.join(dirname, 'c'))) == ['.columns.cols', 'g.bytes', 'h.txt']
+
+shutil.rmtree(dirname)
+
+# no leaf is archived as a block
+try:
+    Route.set_serializer(Best, bytes, ext='.cols', overwrite=True)
+except RuntimeError:
+    pass
+else:
+    raise AssertionError('registered the extension of the blocks')
+
+print('columnar blocks OK')
+
+# === lazy restore ===
+
+from route_v1 import _LazySource
+
+try:
+    _LazySource(Route)
+except TypeError:
+    pass
+else:
+    raise AssertionError('created an abstract source')
+
+r = Route({'a': 1, 'b': {'c': b'foo', 'd': [1, 2]}})
+r.archive_zip(filename)
+
+lazy = Route.restore(filename, lazy=True)
+source = dict.__getitem__(lazy, 'a').source
+assert source.zf.fp is not None
+
+# the zip file is closed once every leaf is loaded
+assert lazy['a'] == 1 and lazy['b/c'] == b'foo'
+assert source.zf.fp is not None
+assert lazy['b/d'] == [1, 2]
+assert source.zf.fp is None
+assert lazy == r
+
+# and reopened for the placeholders shared by a copy
+lazy = Route.restore(filename, lazy=True)
+source = dict.__getitem__(lazy, 'a').source
+other = copy.copy(lazy)
+
+assert lazy == r and source.zf.fp is None
+assert other['a'] == 1
+
+# kept open with the cache, until closed
+lazy = Route.restore(filename, lazy=True, cache_size=1024)
+with dict.__getitem__(lazy, 'a').source as source:
+    assert lazy == r and source.zf.fp is not None
+assert source.zf.fp is None
+
+# the zip files given by the user are never closed
+with zipfile.ZipFile(filename, 'r') as zf:
+    lazy = Route.restore(zf, lazy=True)
+    assert lazy == r and zf.fp is not None
+
+os.remove(filename)
+
+print('lazy restore OK')